@@ -272,6 +272,11 @@ class Ui_QMainWindow(object):
         self.ComboBox01 = QComboBox(self.ModeFrame01)
         self.ComboBox01.addItem("")
         self.ComboBox01.addItem("")
+        self.ComboBox01.addItem("")
+        self.ComboBox01.addItem("")
+        self.ComboBox01.addItem("")
+        self.ComboBox01.addItem("")
+        self.ComboBox01.addItem("")
         self.ComboBox01.setObjectName(u"ComboBox01")
         self.ComboBox01.setEnabled(False)
         self.ComboBox01.setGeometry(QRect(20, 20, 91, 22))
@@ -328,7 +333,7 @@ class Ui_QMainWindow(object):
         self.LineEditMark01 = QLineEdit(self.ModeFrame04)
         self.LineEditMark01.setObjectName(u"LineEditMark01")
         self.LineEditMark01.setGeometry(QRect(60, 50, 51, 20))
-        self.LineEditMark01.setMaxLength(2)
+        self.LineEditMark01.setMaxLength(3)
         self.LineEditMark01.setAlignment(Qt.AlignmentFlag.AlignLeading|Qt.AlignmentFlag.AlignLeft|Qt.AlignmentFlag.AlignVCenter)
         self.LineEditMark01.setClearButtonEnabled(False)
         self.LockCheckBox03 = QCheckBox(self.ModeFrame04)
@@ -369,7 +374,7 @@ class Ui_QMainWindow(object):
         self.LineEditMark02 = QLineEdit(self.ModeFrame05)
         self.LineEditMark02.setObjectName(u"LineEditMark02")
         self.LineEditMark02.setGeometry(QRect(60, 50, 51, 20))
-        self.LineEditMark02.setMaxLength(2)
+        self.LineEditMark02.setMaxLength(3)
         self.LineEditMark02.setAlignment(Qt.AlignmentFlag.AlignLeading|Qt.AlignmentFlag.AlignLeft|Qt.AlignmentFlag.AlignVCenter)
         self.LineEditMark02.setClearButtonEnabled(False)
         self.LockCheckBox04 = QCheckBox(self.ModeFrame05)
@@ -385,6 +390,18 @@ class Ui_QMainWindow(object):
         self.LockAllCheckBox.setObjectName(u"LockAllCheckBox")
         self.LockAllCheckBox.setGeometry(QRect(410, 240, 81, 21))
         self.LockAllCheckBox.setFont(font1)
+        self.FullCheckBox = QCheckBox(self.Tab01)
+        self.FullCheckBox.setObjectName(u"FullCheckBox")
+        self.FullCheckBox.setGeometry(QRect(230, 268, 81, 21))
+        self.FullCheckBox.setFont(font1)
+        self.ResumeCheckBox = QCheckBox(self.Tab01)
+        self.ResumeCheckBox.setObjectName(u"ResumeCheckBox")
+        self.ResumeCheckBox.setGeometry(QRect(310, 268, 81, 21))
+        self.ResumeCheckBox.setFont(font1)
+        self.ShuffleCheckBox = QCheckBox(self.Tab01)
+        self.ShuffleCheckBox.setObjectName(u"ShuffleCheckBox")
+        self.ShuffleCheckBox.setGeometry(QRect(390, 268, 81, 21))
+        self.ShuffleCheckBox.setFont(font1)
         self.Tip03 = QLabel(self.Tab01)
         self.Tip03.setObjectName(u"Tip03")
         self.Tip03.setGeometry(QRect(270, 240, 101, 21))
@@ -410,6 +427,9 @@ class Ui_QMainWindow(object):
         self.ExportButton03 = QPushButton(self.ModeFrame03)
         self.ExportButton03.setObjectName(u"ExportButton03")
         self.ExportButton03.setGeometry(QRect(100, 20, 81, 23))
+        self.PlanButton = QPushButton(self.ModeFrame03)
+        self.PlanButton.setObjectName(u"PlanButton")
+        self.PlanButton.setGeometry(QRect(100, 50, 81, 23))
         self.Label07 = QLabel(self.Tab01)
         self.Label07.setObjectName(u"Label07")
         self.Label07.setGeometry(QRect(20, 160, 35, 20))
@@ -1012,6 +1032,11 @@ class Ui_QMainWindow(object):
         self.LockCheckBox01.setText(QCoreApplication.translate("QMainWindow", u"\u9501\u5b9a", None))
         self.ComboBox01.setItemText(0, QCoreApplication.translate("QMainWindow", u"HTTP Api", None))
         self.ComboBox01.setItemText(1, QCoreApplication.translate("QMainWindow", u"HTTP Header", None))
+        self.ComboBox01.setItemText(2, QCoreApplication.translate("QMainWindow", u"Async Api", None))
+        self.ComboBox01.setItemText(3, QCoreApplication.translate("QMainWindow", u"Known First", None))
+        self.ComboBox01.setItemText(4, QCoreApplication.translate("QMainWindow", u"Multi Process", None))
+        self.ComboBox01.setItemText(5, QCoreApplication.translate("QMainWindow", u"Multicast", None))
+        self.ComboBox01.setItemText(6, QCoreApplication.translate("QMainWindow", u"Watch", None))
 
         self.Label05.setText(QCoreApplication.translate("QMainWindow", u"\u6a21\u5f0f", None))
         self.LockCheckBox02.setText(QCoreApplication.translate("QMainWindow", u"\u9501\u5b9a", None))
@@ -1032,10 +1057,14 @@ class Ui_QMainWindow(object):
         self.LockCheckBox04.setText(QCoreApplication.translate("QMainWindow", u"\u9501\u5b9a", None))
         self.Label09.setText(QCoreApplication.translate("QMainWindow", u"\u641c\u7d22\u53c2\u6570", None))
         self.LockAllCheckBox.setText(QCoreApplication.translate("QMainWindow", u"\u5168\u90e8\u9501\u5b9a", None))
+        self.FullCheckBox.setText(QCoreApplication.translate("QMainWindow", u"\u5168\u91cf\u626b\u63cf", None))
+        self.ResumeCheckBox.setText(QCoreApplication.translate("QMainWindow", u"\u7ee7\u7eed\u4e0a\u6b21", None))
+        self.ShuffleCheckBox.setText(QCoreApplication.translate("QMainWindow", u"\u4e71\u5e8f\u626b\u63cf", None))
         self.Tip03.setText(QCoreApplication.translate("QMainWindow", u"<a style='color: #0066cc' href=\"https://doc.qt.io/qtforpython-6/\">Power By PySide6</a>", None))
         self.ExportButton01.setText(QCoreApplication.translate("QMainWindow", u"\u5bfc\u51fa\u4e3a TXT", None))
         self.ExportButton02.setText(QCoreApplication.translate("QMainWindow", u"\u5bfc\u51fa\u4e3a CSV", None))
         self.ExportButton03.setText(QCoreApplication.translate("QMainWindow", u"\u590d\u5236\u5230\u5217\u8868", None))
+        self.PlanButton.setText(QCoreApplication.translate("QMainWindow", u"\u641c\u7d22\u4f30\u7b97", None))
         self.Label07.setText(QCoreApplication.translate("QMainWindow", u"\u7ed3\u679c", None))
         self.TabWidget.setTabText(self.TabWidget.indexOf(self.Tab01), QCoreApplication.translate("QMainWindow", u"\u641c\u7d22", None))
         self.LockCheckBox0201.setText(QCoreApplication.translate("QMainWindow", u"\u9501\u5b9a", None))
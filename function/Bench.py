@@ -0,0 +1,49 @@
+"""对比套接字探测与 requests 探测的耗时：python -m function.Bench [次数]"""
+import ipaddress
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .Config import DEFAULT_CONFIG
+from .FunctionBox import ClientFunc
+from .Probe import AdaptiveTimeout, Fingerprint, ScanContext, SocketProbe
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Server', 'ALike')
+        self.end_headers()
+        self.wfile.write(b'<title>ALike</title>')
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+def bench(count):
+    """本地 HTTP 服务上逐个探测 count 次，CPU 时间包含同进程内服务端的开销，两种实现相同"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ip = ipaddress.IPv4Address('127.0.0.1')
+    # 样本数量设为不会触发超时调整，避免输出日志
+    config = dict(DEFAULT_CONFIG, probe_ports=[f'http:{server.server_port}'], timeout_samples=count * 4 + 8)
+    for mode in (0, 1):
+        context = ScanContext(config, Fingerprint(mode), AdaptiveTimeout(config))
+        paths = {'socket': lambda: SocketProbe(mode, context).search(ip),
+                 'requests': lambda: ClientFunc.search(ip, mode, context)}
+        for name, run in paths.items():
+            assert run() != 0
+            wall, cpu = time.perf_counter(), time.process_time()
+            for _ in range(count):
+                run()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            print(f'{"GET " if mode == 0 else "HEAD"} {name:<8} {count} 次：'
+                  f'每次 {wall / count * 1e6:.0f} us，CPU {cpu / count * 1e6:.0f} us')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
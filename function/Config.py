@@ -0,0 +1,57 @@
+import json
+import os
+
+from .MessageBox import warning
+
+CONFIG_FILE = 'search.json'
+
+# 搜索配置默认值，可在当前文件夹的 search.json 中覆盖任意一项
+DEFAULT_CONFIG = {
+    'timeout': 0.5,  # 尚无 RTT 样本时的连接与读取超时（秒）
+    'timeout_percentile': 95,  # 以该分位数的 RTT 推算超时
+    'timeout_factor': 3,  # 超时 = 分位数 RTT * 倍数
+    'timeout_samples': 8,  # 每个子网收集多少个样本后调整一次超时
+    'timeout_min': 0.05,
+    'timeout_max': 3.0,
+    'subnet_prefix': 24,  # 按该前缀长度划分子网
+    'subnet_prefix6': 64,  # IPv6 地址按该前缀长度划分子网
+    'subnet_concurrency': 0,  # 每个子网同时在途的探测数量上限，0 为不限制
+    'stats_rows': 20,  # 搜索结束时打印的子网统计行数，按连接 RTT 从慢到快排列，0 为不打印
+    'include_file': None,  # 包含列表文件，设置后只搜索列表内的地址，文件不存在时不启动搜索
+    'exclude_file': 'exclude.txt',  # 排除列表文件，列表内的地址永不探测，默认的 exclude.txt 不存在时忽略
+    'probe_ports': ['http:80'],  # 按顺序探测的协议与端口，如 ["http:80", "http:8080", "https:443"]
+    'http_client': 'socket',  # HTTP Api 与 HTTP Header 模式的探测实现：socket 为套接字直连，requests 为 requests 会话
+    'body_bytes': 256,  # HTTP Api 探测最多读取的响应体字节数
+    'fingerprints': None,  # 型号指纹规则表，None 时使用 Probe.FINGERPRINTS
+    'neighbor_first': True,  # 最先探测本机邻居表（ARP 缓存与 IPv6 邻居表）中的地址
+    'ipv6_range_max': 65536,  # IPv6 区间超过该地址数量时不逐个探测，只探测邻居表与组播回显中落在其中的地址
+    'ipv6_echo': True,  # 存在过大的 IPv6 区间时，先向各接口的全节点组播地址发送 ping 收集在线主机
+    'negative_ttl': 3600 * 6,  # 无响应地址的缓存有效期（秒），0 为不使用负缓存
+    'negative_skip': False,  # True 跳过缓存中的地址，False 延后到最后探测
+    'async_concurrency': 1000,  # 事件循环模式同时在途的探测数量
+    'checkpoint_interval': 5,  # 搜索断点的保存间隔（秒），同时写入结果文件中尚未写入的结果
+    'result_file': None,  # 结果文件，设置后每发现一台设备即追加一行，扩展名为 .csv 时写入 CSV，否则写入 JSONL
+    'result_batch': 100,  # 结果文件每攒满该数量的结果写入一次
+    'shard_processes': 0,  # Multi Process 模式的进程数量，0 为 CPU 核心数
+    'shard_chunk': 1024,  # Multi Process 模式每批交给进程的地址数量
+    'watch_interval': 300,  # Watch 模式每轮搜索的周期（秒），每轮的探测均匀分布在整个周期内
+    'discovery_window': 3,  # Multicast 模式收集应答的时间窗口（秒）
+    'discovery_targets': None,  # 组播查询目标 [[地址, 端口, "ssdp" 或 "mdns"]]，None 时使用 Discovery.DISCOVERY_TARGETS
+    'discovery_ssdp_st': 'ssdp:all',  # SSDP 查询的搜索目标
+    'discovery_mdns_service': '_http._tcp.local',  # mDNS 查询的服务名
+    'rate_limit': 0,  # 全部探测引擎合计每秒最多发起的探测数量，0 为不限速
+    'rate_burst': 100,  # 令牌桶容量，允许的瞬时突发探测数量
+    'rate_report': 5,  # 实时探测速率的输出间隔（秒），0 为不输出
+}
+
+
+def load_config(path=CONFIG_FILE):
+    """读取搜索配置，缺省项使用默认值"""
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='UTF-8') as file:
+                config.update(json.load(file))
+        except (OSError, ValueError) as e:
+            warning(f'配置文件 {path} 读取失败，使用默认配置：{e}')
+    return config
@@ -0,0 +1,96 @@
+import asyncio
+import ipaddress
+import socket
+import struct
+
+from .MessageBox import info
+from .Probe import AsyncProbe, ScanContext
+
+# 默认组播查询目标 [地址, 端口, 协议]，可在 search.json 中改为本地应答程序的地址用于测试
+DISCOVERY_TARGETS = [
+    ['239.255.255.250', 1900, 'ssdp'],
+    ['224.0.0.251', 5353, 'mdns'],
+]
+
+
+def ssdp_query(st='ssdp:all', mx=2):
+    """SSDP M-SEARCH 报文"""
+    return ('M-SEARCH * HTTP/1.1\r\n'
+            'HOST: 239.255.255.250:1900\r\n'
+            'MAN: "ssdp:discover"\r\n'
+            f'MX: {mx}\r\n'
+            f'ST: {st}\r\n\r\n').encode('ascii')
+
+
+def mdns_query(service='_http._tcp.local'):
+    """mDNS PTR 查询报文，从非 5353 端口发送，应答者按传统单播方式直接回复到发送端口"""
+    name = b''.join(bytes([len(label)]) + label.encode('ascii') for label in service.strip('.').split('.'))
+    # 报文头：ID 0，标志 0，1 个问题；问题：名称，类型 PTR（12），类 IN 并置 QU 位要求单播应答
+    return struct.pack('!6H', 0, 0, 1, 0, 0, 0) + name + b'\x00' + struct.pack('!2H', 12, 0x8001)
+
+
+class _ReplyProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_reply):
+        self.on_reply = on_reply
+
+    def datagram_received(self, data, addr):
+        self.on_reply(addr[0])
+
+    def error_received(self, exc):
+        pass
+
+
+class MulticastDiscovery:
+    """组播发现引擎，发送一次 SSDP 与 mDNS 查询，在限定窗口内收集应答者并以 HTTP 探测确认型号"""
+
+    def __init__(self, context: ScanContext, targets=None, window=3.0):
+        self.context = context
+        self.targets = targets or DISCOVERY_TARGETS
+        self.window = window
+        self.probe = AsyncProbe(0, context)
+        self.seen = set()
+        self._stop_flag = False
+
+    def stop(self):
+        """响应停止信号"""
+        self._stop_flag = True
+
+    def run(self, hosts, callback):
+        """阻塞运行到应答窗口结束且应答者全部确认，hosts 不使用，仅为与其他引擎保持一致"""
+        asyncio.run(self._main(callback))
+
+    def query(self, kind):
+        config = self.context.config
+        if kind == 'ssdp':
+            return ssdp_query(config['discovery_ssdp_st'])
+        return mdns_query(config['discovery_mdns_service'])
+
+    async def _main(self, callback):
+        loop = asyncio.get_running_loop()
+        checks = []
+
+        def on_reply(ip):
+            # 同一设备可能对多个查询应答，只确认一次
+            if ip in self.seen or self._stop_flag:
+                return
+            self.seen.add(ip)
+            checks.append(loop.create_task(self.probe.check(ipaddress.ip_address(ip), callback)))
+
+        transport, _ = await loop.create_datagram_endpoint(lambda: _ReplyProtocol(on_reply),
+                                                           local_addr=('0.0.0.0', 0), family=socket.AF_INET)
+        try:
+            sock = transport.get_extra_info('socket')
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            for host, port, kind in self.targets:
+                transport.sendto(self.query(kind), (host, int(port)))
+            # 在应答窗口内等待，可被停止信号提前结束
+            end = loop.time() + self.window
+            while not self._stop_flag and loop.time() < end:
+                await asyncio.sleep(0.1)
+        finally:
+            transport.close()
+        if self._stop_flag:  # 被停止时不再等待确认中的探测
+            for check in checks:
+                check.cancel()
+        await asyncio.gather(*checks, return_exceptions=True)
+        info(f'组播发现结束，共 {len(self.seen)} 个应答者')
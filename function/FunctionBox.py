@@ -1,55 +1,95 @@
 import hashlib
 import os
-from ipaddress import IPv4Address
+import threading
+from ipaddress import IPv4Address, IPv6Address
 from re import search
 from typing import Union
 
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from .Probe import ScanContext, TlsContext
+from .Target import url_host
+
+# 设备多为自签名证书，探测时不校验证书，也不输出相应的警告
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class TlsAdapter(HTTPAdapter):
+    """HTTPS 连接使用全局共享的 TLS 上下文，复用上下文与各主机的 TLS 会话"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = TlsContext.instance()
+        super().init_poolmanager(*args, **kwargs)
+
+
+class SessionPool:
+    """HTTP 会话池，每个工作线程持有一个复用连接的会话"""
+    _local = threading.local()
+    pool_connections = 256  # 每个会话缓存的主机连接池数量
+    pool_maxsize = 4  # 每个主机保持的长连接数量
+
+    @classmethod
+    def get(cls) -> requests.Session:
+        session = getattr(cls._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.trust_env = False  # 不读取代理等环境变量
+            session.verify = False
+            adapter = TlsAdapter(pool_connections=cls.pool_connections, pool_maxsize=cls.pool_maxsize, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            cls._local.session = session
+        return session
 
 
 class ClientFunc:
 
 
     @staticmethod
-    def search(ip, mode, model):
-        if mode == 0:  # Api
-            if model == 0:  # ALike
-                try:
-                    api = f'http://{ip}'
-                    response = requests.get(api, timeout=0.5)
-                    if response.status_code == 200:
-                        return ip
-                except BaseException:  # noqa
-                    return 0
-            elif model == 1:  # BLike
-                try:
-                    api = f'http://{ip}'
-                    response = requests.get(api, timeout=0.5)
-                    if response.status_code == 200:
-                        return ip
-                except BaseException:  # noqa
-                    return 0
-        else:  # Header
-            if model == 0:
-                try:
-                    api = f'http://{ip}'
-                    response = requests.head(api, timeout=0.5)
-                    if response.status_code == 200:
-                        return ip
-                except BaseException:  # noqa
-                    return 0
-            elif model == 1:
-                try:
-                    api = f'http://{ip}'
-                    response = requests.head(api, timeout=0.5)
-                    if response.status_code == 200:
-                        return ip
-                except BaseException:  # noqa
-                    return 0
-        return 0
+    def search(ip, mode, context: ScanContext):
+        """探测单个地址，识别出型号返回 (ip, model)，否则返回 0，地址已在预扫描中计入限速"""
+        timeouts = context.timeouts
+        timeout = timeouts.get(ip)
+        # 按端口列表依次请求，第一个有应答的端口决定结果
+        for scheme, port in context.endpoints:
+            api = f'{scheme}://{url_host(ip)}:{port}'
+            try:
+                if mode == 0:  # Api
+                    response, body = ClientFunc.get_head(api, timeout, context.config['body_bytes'])
+                else:  # Header
+                    response, body = SessionPool.get().head(api, timeout=timeout), b''
+            except BaseException:  # noqa
+                continue
+            break
+        else:
+            context.miss(ip)
+            return 0
+        latency = response.elapsed.total_seconds()
+        timeouts.record(ip, read=latency)
+        model = context.fingerprint.classify(response.status_code, response.headers, body)
+        if model is None:
+            context.miss(ip)
+            return 0
+        context.hit(ip, model, latency)
+        return ip, model
+
+    @staticmethod
+    def get_head(url, timeout, body_bytes=0):
+        """只读取状态行、响应头和至多 body_bytes 字节的响应体，不跟随重定向，读取后立即关闭连接
+        与套接字探测一样不请求压缩，服务器仍返回压缩内容时解压后再交给指纹识别
+        """
+        response = SessionPool.get().get(url, timeout=timeout, stream=True, allow_redirects=False,
+                                         headers={'Accept-Encoding': 'identity'})
+        try:
+            body = response.raw.read(body_bytes, decode_content=True) if body_bytes > 0 else b''
+        finally:
+            response.close()
+        return response, body
 
     @staticmethod
-    def export(client_list: list[IPv4Address], model, filetype):
+    def export(client_list: list[IPv4Address | IPv6Address], model, filetype):
         file_name = 'Client'
         if model == 0:
             file_name += 'ALike'
@@ -58,13 +98,13 @@ class ClientFunc:
         if filetype == 0:
             with open(file_name + '.txt', 'w', encoding='UTF-8') as file:
                 for each in client_list:
-                    file.write(each.exploded + '\n')
+                    file.write(str(each) + '\n')
         elif filetype == 1:
             with open(file_name + '.csv', 'w', encoding='UTF-8') as file:
                 count = 1
                 file.write(f'编号, 设备IP' + '\n')
                 for each in client_list:
-                    file.write(f'{count}, {each.exploded}' + '\n')
+                    file.write(f'{count}, {each}' + '\n')
                     count += 1
         return f'请到当前文件夹中查看文件：{file_name}。'
 
@@ -119,12 +159,25 @@ class ClientFunc:
 
     @staticmethod
     def handle_http(data: list, model):
+        """发送接口请求，与搜索共用线程会话池
+        :param data: [ip, method, api, data]
+        """
+        ip, method, api, body = data
+        methods = ['GET', 'POST', 'PUT', 'DELETE', 'HEAD']
         if model == 0:
-            return f'执行 A 相关请求, {data}'
+            name = 'A'
         elif model == 1:
-            return f'执行 B 相关请求, {data}'
+            name = 'B'
         else:
             return 0
+        api = api.strip()
+        if not api.startswith('/'):
+            api = '/' + api
+        try:
+            response = SessionPool.get().request(methods[method], f'http://{url_host(ip)}{api}', data=body.encode('UTF-8'), timeout=3)
+            return f'执行 {name} 相关请求, {ip} {response.status_code}'
+        except requests.RequestException as e:
+            return f'执行 {name} 相关请求失败, {ip} {e}'
 
     @staticmethod
     def handle_set(data: list, model):
@@ -0,0 +1,149 @@
+import concurrent.futures
+import ipaddress
+import os
+import re
+import socket
+import subprocess
+import sys
+
+from .Target import to_value
+
+ARP_FILE = '/proc/net/arp'
+ALL_NODES = 'ff02::1'  # IPv6 链路本地全节点组播地址
+
+# arp -a 输出中的 IPv4 地址与 MAC 地址，Windows 为 "192.168.1.1  aa-bb-cc-dd-ee-ff  动态"
+_ARP_LINE = re.compile(r'(\d{1,3}(?:\.\d{1,3}){3})\)?\s+(?:at\s+)?([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})')
+# 命令输出中的 IPv6 地址，可带接口标识，如 "fe80::1%eth0"
+_V6_TOKEN = re.compile(r'(?<![\w:.])((?:[0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{0,4})(?:%([\w.-]+))?')
+_MAC = re.compile(r'[0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5}')
+
+
+def _valid_mac(mac: str):
+    """排除未完成解析、广播与组播的表项"""
+    octets = [int(each, 16) for each in re.split('[:-]', mac)]
+    return any(octets) and not octets[0] & 1
+
+
+def _run(*command):
+    # Windows 下不弹出控制台窗口
+    flags = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=5, creationflags=flags)
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return result.stdout.decode(errors='ignore')
+
+
+def read_neighbors():
+    """读取本机邻居表（ARP 缓存）中已解析的 IPv4 地址，Linux 读取 /proc/net/arp，其余系统解析 arp -a，返回整数地址列表"""
+    neighbors = []
+    if os.path.exists(ARP_FILE):
+        with open(ARP_FILE, 'r', encoding='UTF-8') as file:
+            next(file, None)  # 表头
+            for line in file:
+                fields = line.split()
+                # 标志 0x0 为未完成解析
+                if len(fields) >= 4 and fields[2] != '0x0' and _valid_mac(fields[3]):
+                    neighbors.append(int(ipaddress.IPv4Address(fields[0])))
+        return neighbors
+    for ip, mac in _ARP_LINE.findall(_run('arp', '-a')):
+        if _valid_mac(mac):
+            neighbors.append(int(ipaddress.IPv4Address(ip)))
+    return neighbors
+
+
+def _v6_address(text):
+    """解析命令输出中的 IPv6 地址，无效地址与组播地址返回 None"""
+    for candidate in (text, text.rstrip(':')):  # 行内紧跟冒号时，如 "from 2001:db8::1: icmp_seq=1"
+        try:
+            ip = ipaddress.IPv6Address(candidate)
+        except ValueError:
+            continue
+        return None if ip.is_multicast or ip.is_unspecified else ip
+    return None
+
+
+def _add_v6(neighbors, text, scope):
+    """记录一个 IPv6 地址，只有链路本地地址需要保留接口"""
+    ip = _v6_address(text)
+    if ip is not None:
+        neighbors[to_value(ip)] = scope if ip.is_link_local and scope else None
+
+
+def read_neighbors6():
+    """读取本机 IPv6 邻居表中可达的地址，Linux 解析 ip -6 neigh，Windows 解析 netsh，macOS 解析 ndp -an
+    :return: {整数编号: 接口}，接口仅对链路本地地址有效，其余为 None
+    """
+    neighbors = {}
+    if sys.platform == 'win32':
+        scope = None
+        for line in _run('netsh', 'interface', 'ipv6', 'show', 'neighbors').splitlines():
+            # 每个接口一段，段首为 "Interface 12: Ethernet"，地址行为 "fe80::1  aa-bb-cc-dd-ee-ff  Reachable"
+            header = re.match(r'\S+\s+(\d+)\s*[:：]', line)
+            if header:
+                scope = header.group(1)
+                continue
+            fields = line.split()
+            if len(fields) >= 2 and _MAC.fullmatch(fields[1]) and _valid_mac(fields[1]):
+                _add_v6(neighbors, fields[0], scope)
+        return neighbors
+    if sys.platform == 'darwin':
+        for line in _run('ndp', '-an').splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and _MAC.fullmatch(fields[1]) and _valid_mac(fields[1]):
+                address, _, scope = fields[0].partition('%')
+                _add_v6(neighbors, address, scope)
+        return neighbors
+    for line in _run('ip', '-6', 'neigh', 'show').splitlines():
+        # "fe80::1 dev eth0 lladdr aa:bb:cc:dd:ee:ff REACHABLE"，未完成解析与解析失败的表项没有 lladdr
+        fields = line.split()
+        if 'lladdr' not in fields or fields[-1] in ('FAILED', 'INCOMPLETE'):
+            continue
+        scope = fields[fields.index('dev') + 1] if 'dev' in fields else None
+        _add_v6(neighbors, fields[0], scope)
+    return neighbors
+
+
+def _interfaces():
+    """可发送组播的网络接口，返回 [(名称, 序号)]，不含回环接口"""
+    try:
+        interfaces = socket.if_nameindex()
+    except OSError:
+        return []
+    return [(name, index) for index, name in interfaces if not name.startswith('lo')]
+
+
+def _echo(name, index, count):
+    """向一个接口的全节点组播地址发送 ping，返回输出"""
+    if sys.platform == 'win32':
+        return _run('ping', '-n', str(count), '-w', '1000', f'{ALL_NODES}%{index}')
+    if sys.platform == 'darwin':
+        return _run('ping6', '-c', str(count), f'{ALL_NODES}%{name}')
+    return _run('ping', '-6', '-c', str(count), '-w', str(count + 1), f'{ALL_NODES}%{name}')
+
+
+def echo_all_nodes(count=2):
+    """向各接口的全节点组播地址发送 ICMPv6 回显请求，链路上的 IPv6 主机均会应答，同时刷新本机邻居表
+    :return: {整数编号: 接口}，同 read_neighbors6
+    """
+    interfaces = _interfaces()
+    if not interfaces:
+        return {}
+    neighbors = {}
+    with concurrent.futures.ThreadPoolExecutor(len(interfaces)) as executor:
+        outputs = executor.map(lambda each: (each, _echo(*each, count)), interfaces)
+        for (name, index), output in outputs:
+            for line in output.splitlines():
+                # 应答行形如 "64 bytes from fe80::1%eth0: icmp_seq=1"，Windows 为 "来自 fe80::1%12 的回复"
+                for address, scope in _V6_TOKEN.findall(line):
+                    _add_v6(neighbors, address, scope or (str(index) if sys.platform == 'win32' else name))
+    return neighbors
+
+
+def collect_neighbors(ipv4=True, echo=False):
+    """在工作线程中读取邻居表，echo 为 True 时先向全节点组播地址发送回显，使链路上的 IPv6 主机进入邻居表
+    :return: (IPv4 整数地址列表, {整数编号: 接口})，同 read_neighbors 与 read_neighbors6
+    """
+    neighbors6 = echo_all_nodes() if echo else {}
+    neighbors6.update(read_neighbors6())
+    return (read_neighbors() if ipv4 else []), neighbors6
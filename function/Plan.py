@@ -0,0 +1,73 @@
+from .Target import V6_BASE, subnet_of, to_address
+
+
+def subnet_counts(intervals, prefix, prefix6=64):
+    """按子网统计区间内的地址数量，不展开地址，IPv4 按 prefix、IPv6 按 prefix6 划分，返回 {子网: 数量}"""
+    counts = {}
+    for start, end in intervals:
+        # IPv6 编号自 V6_BASE 起，子网边界需按地址本身对齐
+        base = V6_BASE if start >= V6_BASE else 0
+        size = 1 << (128 - prefix6 if base else 32 - prefix)
+        block = start - (start - base) % size
+        while block <= end:
+            subnet = str(subnet_of(to_address(block), prefix, prefix6))
+            counts[subnet] = counts.get(subnet, 0) + min(end, block + size - 1) - max(start, block) + 1
+            block += size
+    return counts
+
+
+def estimate(counts, history, config, concurrency, attempts=1, workers=0):
+    """按各子网的历史统计估算搜索耗时
+    :param counts: {子网: 地址数量}
+    :param history: {子网: (probed, hits, latency, rtt, timeout, updated)}，见 Store.SubnetStore
+    :param concurrency: 同时在途的探测数量
+    :param attempts: 无应答地址需要等待超时的次数，逐个端口探测时为端口数量
+    :param workers: 预扫描后 HTTP 探测的工作器数量，0 为单阶段探测
+    :return: (预计秒数, 预计应答数量, 有历史统计的子网数量)
+    """
+    default = config['timeout']
+    cap = config['subnet_concurrency']
+    total = 0.0
+    requests = 0.0  # HTTP 阶段的工作量
+    slowest = 0.0  # 有子网并发上限时，单个子网的耗时可能超过整体平均
+    responders = 0.0
+    known = 0
+    for subnet, count in counts.items():
+        record = history.get(subnet)
+        if record:
+            probed, hits, latency, rtt, timeout, _ = record
+            rate = hits / probed if probed else 0
+            connect = rtt or 0
+            alive = connect + (latency or 0)
+            dead = (timeout or default) * attempts
+            known += 1
+        else:  # 没有历史统计的子网按全部无应答估算
+            rate, connect, alive, dead = 0, 0, 0, default * attempts
+        if workers:
+            # 预扫描只等待连接，应答的地址随后在 HTTP 阶段完成请求
+            work = count * (rate * connect + (1 - rate) * dead)
+            request = count * rate * alive
+        else:
+            work, request = count * (rate * alive + (1 - rate) * dead), 0
+        total += work
+        requests += request
+        responders += count * rate
+        if cap > 0:  # 子网名额在 HTTP 探测结束后才归还
+            slowest = max(slowest, (work + request) / cap)
+    # 两阶段同时进行，耗时取决于较慢的一段
+    seconds = max(total / concurrency, requests / workers if workers else 0, slowest)
+    if config['rate_limit'] > 0:
+        seconds = max(seconds, sum(counts.values()) / config['rate_limit'])
+    return seconds, responders, known
+
+
+def format_duration(seconds):
+    """格式化为 时/分/秒"""
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f'{hours} 小时 {minutes} 分 {seconds} 秒'
+    if minutes:
+        return f'{minutes} 分 {seconds} 秒'
+    return f'{seconds} 秒'
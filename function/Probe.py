@@ -0,0 +1,823 @@
+import asyncio
+import errno
+import re
+import selectors
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows 没有文件描述符上限
+    resource = None
+
+from .MessageBox import info
+from .Target import subnet_of, to_value, url_host
+
+
+def build_request(ip, method='GET', path='/', port=80):
+    """构造最小 HTTP/1.1 请求报文"""
+    host = url_host(ip) if port in (80, 443) else f'{url_host(ip)}:{port}'
+    return (f'{method} {path} HTTP/1.1\r\n'
+            f'Host: {host}\r\n'
+            f'User-Agent: MyToolsBox\r\n'
+            f'Accept: */*\r\n'
+            f'Connection: close\r\n\r\n').encode('ascii')
+
+
+def sock_address(ip, port):
+    """套接字连接地址，链路本地 IPv6 地址需经 getaddrinfo 解析出接口序号"""
+    if ip.version == 6 and ip.scope_id:
+        return socket.getaddrinfo(str(ip), port, socket.AF_INET6, socket.SOCK_STREAM)[0][4]
+    return str(ip), port
+
+
+def fd_limit(reserve=64):
+    """进程可同时打开的文件描述符数量，扣除预留给数据库、日志等的部分，没有上限时返回 0"""
+    if resource is None:
+        return 0
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return 0
+    return max(1, soft - reserve)
+
+
+def parse_status(line: bytes):
+    """解析状态行，返回状态码，无法解析时返回 0"""
+    parts = line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b'HTTP/'):
+        return 0
+    try:
+        return int(parts[1])
+    except ValueError:
+        return 0
+
+
+def parse_head(head: bytes):
+    """解析响应头部分，返回 (状态码, {小写头名: 值})"""
+    lines = head.split(b'\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(b':')
+        if sep:
+            headers[name.strip().decode('latin-1').lower()] = value.strip().decode('latin-1')
+    return parse_status(lines[0]), headers
+
+
+def parse_endpoints(items):
+    """解析探测端口列表，如 ["http:80", "http:8080", "https:443"]，只写端口时为 http，返回 [(scheme, port)]"""
+    endpoints = []
+    for item in items:
+        scheme, sep, port = str(item).rpartition(':')
+        if not sep:
+            scheme = 'http'
+        if scheme not in ('http', 'https') or not port.isdigit():
+            raise ValueError(f'探测端口格式错误：{item}')
+        endpoints.append((scheme, int(port)))
+    return endpoints
+
+
+class _SessionSocket(ssl.SSLSocket):
+    """关闭前把 TLS 会话存入所属上下文的缓存"""
+
+    def close(self):
+        if isinstance(self.context, TlsContext):
+            self.context.remember(self.server_hostname, self)
+        super().close()
+
+
+class TlsContext(ssl.SSLContext):
+    """全局共享的客户端 TLS 上下文，不校验证书（设备多为自签名证书），按主机缓存会话与票据，再次连接时恢复握手"""
+    _instance = None
+    sslsocket_class = _SessionSocket
+    max_sessions = 4096
+
+    def __new__(cls):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self):
+        super().__init__()
+        self.check_hostname = False
+        self.verify_mode = ssl.CERT_NONE
+        self.sessions = {}  # host: SSLSession
+        self.sessions_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """单例模式获取上下文，避免每个连接重新创建上下文与加载证书"""
+        if not cls._instance:
+            cls._instance = TlsContext()
+        return cls._instance
+
+    def remember(self, host, connection):
+        """保存连接（SSLSocket 或 SSLObject）的会话，TLS 1.3 的票据在读取响应后才会到达，需在关闭前调用"""
+        session = connection.session if host and connection is not None else None
+        if session is None:
+            return
+        with self.sessions_lock:
+            self.sessions.pop(host, None)
+            self.sessions[host] = session
+            if len(self.sessions) > self.max_sessions:
+                del self.sessions[next(iter(self.sessions))]
+
+    def wrap_socket(self, sock, *args, session=None, server_hostname=None, **kwargs):
+        if session is None and server_hostname:
+            session = self.sessions.get(server_hostname)
+        return super().wrap_socket(sock, *args, session=session, server_hostname=server_hostname, **kwargs)
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and server_hostname:
+            session = self.sessions.get(server_hostname)
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+
+# 型号指纹规则表，键为型号序号（与 ComboBox02 对应），每条规则内的条件需全部满足
+# status：允许的状态码列表，缺省为 [200]；header：[头名, 包含的文本]；body：响应体前缀需匹配的正则
+FINGERPRINTS = {
+    0: [  # ALike
+        {'header': ['Server', 'ALike']},
+        {'body': r'(?i)<title>[^<]*ALike'},
+    ],
+    1: [  # BLike
+        {'header': ['Server', 'BLike']},
+        {'body': r'(?i)<title>[^<]*BLike'},
+    ],
+}
+
+
+class Fingerprint:
+    """型号指纹识别，一次探测即可根据状态码、响应头与响应体前缀判断设备型号"""
+
+    def __init__(self, fallback, rules: dict = None):
+        self.fallback = fallback  # 响应 200 但未命中任何规则时归入的型号
+        self.rules = []
+        for model, items in (rules or FINGERPRINTS).items():
+            for rule in items:
+                header = rule.get('header')
+                body = rule.get('body')
+                self.rules.append((int(model),
+                                   rule.get('status', [200]),
+                                   (header[0].lower(), header[1]) if header else None,
+                                   re.compile(body.encode('UTF-8')) if body else None))
+
+    def classify(self, status, headers, body: bytes):
+        """返回型号序号，无法识别时返回 None"""
+        headers = {name.lower(): value for name, value in headers.items()}
+        for model, allowed, header, pattern in self.rules:
+            if status not in allowed:
+                continue
+            if header and header[1] not in headers.get(header[0], ''):
+                continue
+            if pattern and not pattern.search(body):
+                continue
+            return model
+        return self.fallback if status == 200 else None
+
+
+class AdaptiveTimeout:
+    """按子网统计早期响应者的 RTT，以分位数推算连接与读取超时"""
+
+    def __init__(self, config: dict):
+        self.default = config['timeout']
+        self.percentile = config['timeout_percentile']
+        self.factor = config['timeout_factor']
+        self.samples = config['timeout_samples']
+        self.floor = config['timeout_min']
+        self.ceiling = config['timeout_max']
+        self.prefix = config['subnet_prefix']
+        self.prefix6 = config['subnet_prefix6']
+        self.lock = threading.Lock()
+        self.rtt = {}  # subnet: ([connect rtt], [read rtt])
+        self.count = {}  # subnet: 样本次数
+        self.effective = {}  # subnet: (connect timeout, read timeout)
+
+    def subnet(self, ip):
+        return subnet_of(ip, self.prefix, self.prefix6)
+
+    def get(self, ip):
+        """返回 (连接超时, 读取超时)"""
+        return self.effective.get(self.subnet(ip), (self.default, self.default))
+
+    def record(self, ip, connect=None, read=None):
+        """记录一次响应的连接耗时与首字节耗时（秒）"""
+        subnet = self.subnet(ip)
+        with self.lock:
+            connect_rtt, read_rtt = self.rtt.setdefault(subnet, ([], []))
+            if connect is not None:
+                connect_rtt.append(connect)
+            if read is not None:
+                read_rtt.append(read)
+            count = self.count.get(subnet, 0) + 1
+            self.count[subnet] = count
+            # 在第 n、2n、4n... 个样本时调整，早期响应者决定超时，后续只做少量修正
+            quotient, remainder = divmod(count, self.samples)
+            if remainder != 0 or quotient & (quotient - 1) != 0:
+                return
+            old = self.get(ip)
+            timeout = (self._compute(connect_rtt, old[0]), self._compute(read_rtt, old[1]))
+            self.effective[subnet] = timeout
+        if timeout != old:
+            info(f'子网 {subnet} 超时调整为：连接 {timeout[0] * 1000:.0f} ms，读取 {timeout[1] * 1000:.0f} ms（样本 {count}）')
+
+    def _compute(self, values, current):
+        if not values:
+            return current
+        ordered = sorted(values)
+        value = ordered[min(len(ordered) - 1, len(ordered) * self.percentile // 100)]
+        return round(min(self.ceiling, max(self.floor, value * self.factor)), 3)
+
+
+class RateLimiter:
+    """令牌桶限速器，全局共享，限制所有探测引擎每秒发起的探测数量"""
+    _instance = None
+
+    def __init__(self, rate=0, burst=1, report=5, parent=None):
+        self.lock = threading.Lock()
+        self.parent = parent  # 上级限速器，每个令牌同时从上级获取，用于在全局限速之内再单独限速
+        self.configure(rate, burst, report)
+
+    @classmethod
+    def instance(cls):
+        """单例模式获取限速器，所有工作器与引擎共用同一个令牌桶"""
+        if not cls._instance:
+            cls._instance = RateLimiter()
+        return cls._instance
+
+    def configure(self, rate, burst, report=5):
+        """rate 为每秒探测数量，0 为不限速；burst 为令牌桶容量；report 为速率输出间隔（秒），0 为不输出"""
+        with self.lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self.report = report
+            self.tokens = self.burst
+            self.updated = time.monotonic()
+            self.count = 0  # 本输出周期内的探测数量
+            self.reported = self.updated
+        return self
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """预占一个令牌，返回需要等待的秒数，令牌不足时排队到后续补充的令牌上"""
+        wait = self.parent.reserve() if self.parent is not None else 0
+        if self.rate <= 0:
+            return wait
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return max(wait, -self.tokens / self.rate if self.tokens < 0 else 0)
+
+    def poll(self):
+        """非阻塞获取，成功返回 0，令牌不足时不预占，返回距下一个令牌的秒数"""
+        if self.rate > 0:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens < 1:
+                    return (1 - self.tokens) / self.rate
+                self.tokens -= 1
+        if self.parent is not None:
+            wait = self.parent.poll()
+            if wait:
+                if self.rate > 0:  # 上级令牌不足，退还本级令牌
+                    with self.lock:
+                        self.tokens += 1
+                return wait
+        self._count()
+        return 0
+
+    def acquire(self):
+        """阻塞直到获得一个令牌，供线程工作器使用"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        self.tick()
+
+    async def acquire_async(self):
+        """等待直到获得一个令牌，供事件循环引擎使用"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self.tick()
+
+    def tick(self):
+        """记录一次实际发出的探测，按输出间隔打印实时速率"""
+        if self.parent is not None:
+            self.parent.tick()
+        self._count()
+
+    def _count(self):
+        with self.lock:
+            now = time.monotonic()
+            self.count += 1
+            if not self.report or now - self.reported < self.report:
+                return
+            rate = self.count / (now - self.reported)
+            self.count, self.reported = 0, now
+        limit = f'{self.rate} 个/秒' if self.rate > 0 else '不限速'
+        info(f'当前探测速率：{rate:.0f} 个/秒（{limit}）')
+
+
+class SubnetGate:
+    """按子网限制同时在途的探测数量，子网已满时地址暂存，待该子网有探测完成后再放出，期间先探测其他子网"""
+
+    def __init__(self, hosts, cap, prefix, prefix6=64):
+        self.hosts = iter(hosts)
+        self.cap = cap  # 每个子网同时在途的数量上限，0 为不限制
+        self.shifts = {4: 32 - prefix, 6: 128 - prefix6}
+        self.active = {}  # 子网: 在途数量
+        self.waiting = {}  # 子网: deque 暂存的地址
+        self.ready = deque()  # 已取得名额、等待取用的地址
+        self.exhausted = False
+        self.lock = threading.Condition()
+
+    def take(self):
+        """取下一个可探测的地址，需要等待其他探测完成时返回 None，全部取完时抛出 StopIteration"""
+        if self.cap <= 0:
+            return next(self.hosts)
+        with self.lock:
+            if self.ready:
+                return self.ready.popleft()
+            while not self.exhausted:
+                try:
+                    ip = next(self.hosts)
+                except StopIteration:
+                    self.exhausted = True
+                    break
+                key = self._key(ip)
+                if self.active.get(key, 0) < self.cap:
+                    self.active[key] = self.active.get(key, 0) + 1
+                    return ip
+                self.waiting.setdefault(key, deque()).append(ip)
+            if self.waiting:
+                return None
+            raise StopIteration
+
+    def release(self, ip):
+        """一个地址探测完成，名额优先交给同一子网暂存的地址"""
+        if self.cap <= 0:
+            return
+        key = self._key(ip)
+        with self.lock:
+            queue = self.waiting.get(key)
+            if queue:
+                self.ready.append(queue.popleft())
+                if not queue:
+                    del self.waiting[key]
+            else:
+                self.active[key] -= 1
+                if not self.active[key]:
+                    del self.active[key]
+            self.lock.notify()
+
+    def wait(self, timeout=0.05):
+        with self.lock:
+            self.lock.wait(timeout)
+
+    def _key(self, ip):
+        return ip.version, int(ip) >> self.shifts[ip.version]
+
+
+class SubnetStats:
+    """按子网统计探测数量、应答数量与响应延迟"""
+
+    def __init__(self, prefix, prefix6=64):
+        self.prefix = prefix
+        self.prefix6 = prefix6
+        self.lock = threading.Lock()
+        self.data = {}  # subnet: [探测数量, 应答数量, 延迟合计, 有延迟的应答数量]
+
+    def add(self, ip, hit, latency=None):
+        subnet = subnet_of(ip, self.prefix, self.prefix6)
+        with self.lock:
+            item = self.data.setdefault(subnet, [0, 0, 0.0, 0])
+            item[0] += 1
+            if hit:
+                item[1] += 1
+            if latency is not None:
+                item[2] += latency
+                item[3] += 1
+
+    def rows(self, timeouts: AdaptiveTimeout = None):
+        """返回 [(subnet, 探测数量, 应答数量, 平均延迟, 连接 RTT 中位数, 连接超时)]，无样本的项为 None"""
+        with self.lock:
+            data = {subnet: list(item) for subnet, item in self.data.items()}
+        rows = []
+        for subnet, (probed, hits, total, count) in sorted(data.items(), key=lambda item: to_value(item[0][0])):
+            rtt = timeout = None
+            if timeouts is not None:
+                with timeouts.lock:
+                    samples = sorted(timeouts.rtt.get(subnet, ([], []))[0])
+                rtt = samples[len(samples) // 2] if samples else None
+                timeout = timeouts.get(subnet.network_address)[0]
+            rows.append((str(subnet), probed, hits, total / count if count else None, rtt, timeout))
+        return rows
+
+
+class ScanContext:
+    """一次搜索中各探测引擎共享的状态：配置、指纹、超时与逐个地址的结果记录"""
+
+    def __init__(self, config: dict, fingerprint: Fingerprint, timeouts: AdaptiveTimeout,
+                 negative=None, devices=None, checkpoint=None, limiter: RateLimiter = None, subnets=None, sink=None):
+        self.config = config
+        self.fingerprint = fingerprint
+        self.timeouts = timeouts
+        self.negative = negative  # 负缓存，见 Store.NegativeCache
+        self.devices = devices  # 设备记录，见 Store.DeviceStore
+        self.checkpoint = checkpoint  # 搜索断点，见 Store.ScanCheckpoint
+        self.limiter = limiter or RateLimiter(report=0)  # 探测限速，缺省不限速
+        self.endpoints = parse_endpoints(config['probe_ports'])  # [(scheme, port)] 按顺序探测
+        self.stats = SubnetStats(config['subnet_prefix'], config['subnet_prefix6'])
+        self.subnets = subnets  # 子网统计记录，见 Store.SubnetStore
+        self.sink = sink  # 结果的流式输出，见 Store.ResultSink
+        self.lock = threading.Lock()
+        self.finished = 0  # 已记录结果的地址数量
+        self.aborted = False
+        self.sockets = set()  # 在途的阻塞套接字，终止时关闭
+
+    def gate(self, hosts):
+        """按配置为目标加上子网并发上限"""
+        return SubnetGate(hosts, self.config['subnet_concurrency'], self.config['subnet_prefix'],
+                          self.config['subnet_prefix6'])
+
+    def hit(self, ip, model, latency=None):
+        """地址识别出设备，latency 为响应耗时（秒）"""
+        with self.lock:
+            if self.aborted:
+                return
+            self.finished += 1
+            self.stats.add(ip, True, latency)
+            if self.negative is not None:
+                self.negative.discard(ip)
+            if self.devices is not None:
+                self.devices.add(ip, model, latency)
+            if self.checkpoint is not None:
+                self.checkpoint.add(ip, model)
+        # 结果文件在锁外写入，攒满一批时的文件操作不阻塞其他探测的记录
+        if self.sink is not None:
+            self.sink.add(ip, model, latency)
+
+    def miss(self, ip):
+        """地址无响应或未识别出设备"""
+        with self.lock:
+            if self.aborted:
+                return
+            self.finished += 1
+            self.stats.add(ip, False)
+            if self.negative is not None:
+                self.negative.add(ip)
+            if self.checkpoint is not None:
+                self.checkpoint.add(ip)
+
+    def track(self, sock):
+        """登记在途的阻塞套接字，已终止时返回 False"""
+        with self.lock:
+            if self.aborted:
+                return False
+            self.sockets.add(sock)
+            return True
+
+    def untrack(self, sock):
+        with self.lock:
+            self.sockets.discard(sock)
+
+    def abort(self):
+        """终止搜索，此后的结果不再记录，并中断在途的阻塞套接字，返回已完成的地址数量"""
+        with self.lock:
+            self.aborted = True
+            sockets, self.sockets = self.sockets, set()
+        for sock in sockets:
+            try:
+                # shutdown 可唤醒阻塞在 connect 或 recv 上的线程，Windows 下未连接的套接字需直接关闭
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                sock.close()
+        return self.finished
+
+    def close(self):
+        """搜索结束，保存需要持久化的记录"""
+        if self.negative is not None:
+            self.negative.flush()
+        if self.devices is not None:
+            self.devices.flush()
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+        if self.subnets is not None:
+            self.subnets.save(self.stats.rows(self.timeouts))
+        if self.sink is not None:
+            self.sink.flush()
+
+
+class AsyncProbe:
+    """事件循环探测引擎，在单个线程内保持大量非阻塞 HTTP 探测"""
+
+    # 文件描述符耗尽的错误码，Windows 为 WSAEMFILE，此时不是目标无应答，需稍后重试
+    _exhausted = {errno.EMFILE, errno.ENFILE, 10024}
+
+    def __init__(self, mode, context: ScanContext, concurrency=1000):
+        self.method = 'GET' if mode == 0 else 'HEAD'
+        self.context = context
+        self.timeouts = context.timeouts
+        self.body_bytes = context.config['body_bytes'] if mode == 0 else 0
+        limit = fd_limit()  # 每个在途探测占用一个套接字
+        self.concurrency = min(concurrency, limit) if limit else concurrency
+        self.tls = TlsContext.instance()
+        self._stop_flag = False
+        self._loop = None
+        self._task = None
+        self._released = None  # 子网名额释放的通知，名额已满的协程在此等待
+
+    def stop(self):
+        """响应停止信号，取消全部在途探测并关闭其连接"""
+        self._stop_flag = True
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:  # 事件循环已结束
+                pass
+
+    def run(self, hosts, callback):
+        """阻塞运行直到目标耗尽或被停止，每个目标的结果通过 callback 返回"""
+        try:
+            asyncio.run(self._main(iter(hosts), callback))
+        except asyncio.CancelledError:
+            pass
+
+    async def _main(self, hosts, callback):
+        self._loop, self._task = asyncio.get_running_loop(), asyncio.current_task()
+        try:
+            if self._stop_flag:
+                return
+            # 固定数量的协程共享同一个迭代器，避免一次性创建全部任务
+            self._released = asyncio.Condition()
+            gate = self.context.gate(hosts)
+            runners = [self._runner(gate, callback) for _ in range(self.concurrency)]
+            await asyncio.gather(*runners)
+        finally:
+            self._loop = self._task = None
+
+    async def _runner(self, gate: SubnetGate, callback):
+        while not self._stop_flag:
+            try:
+                ip = gate.take()
+            except StopIteration:
+                return
+            if ip is None:  # 子网名额已满，等待其他探测完成
+                async with self._released:
+                    await self._released.wait()
+                continue
+            await self.check(ip, callback)
+            gate.release(ip)
+            async with self._released:
+                # 每释放一个名额唤醒一个等待者，暂存的地址全部放出后唤醒全部等待者以便结束
+                if gate.waiting:
+                    self._released.notify()
+                else:
+                    self._released.notify_all()
+
+    async def check(self, ip, callback):
+        """限速后探测单个地址，记录结果并通过 callback 返回，文件描述符耗尽时重试而不计为无应答"""
+        await self.context.limiter.acquire_async()
+        while True:
+            start = time.perf_counter()
+            try:
+                result = await self.probe(ip)
+                break
+            except OSError:  # 文件描述符耗尽，等待其他探测释放后重试，不写入负缓存
+                await asyncio.sleep(0.1)
+        if result == 0:
+            self.context.miss(ip)
+        else:
+            self.context.hit(*result, time.perf_counter() - start)
+        callback(result)
+
+    async def probe(self, ip):
+        """按端口列表依次探测，第一个有 HTTP 应答的端口决定结果，识别出型号返回 (ip, model)，否则返回 0"""
+        for scheme, port in self.context.endpoints:
+            answer = await self.fetch(ip, scheme, port)
+            if answer is not None:
+                model = self.context.fingerprint.classify(*answer)
+                return (ip, model) if model is not None else 0
+        return 0
+
+    async def fetch(self, ip, scheme, port):
+        """请求单个端口，返回 (状态码, 响应头, 响应体前缀)，无应答返回 None"""
+        writer = None
+        tls = self.tls if scheme == 'https' else None
+        connect_timeout, read_timeout = self.timeouts.get(ip)
+        try:
+            start = time.perf_counter()
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(str(ip), port, ssl=tls), connect_timeout)
+            connected = time.perf_counter()
+            writer.write(build_request(ip, self.method, port=port))
+            await writer.drain()
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), read_timeout)
+            # TLS 握手计入连接耗时会抬高连接超时，只记录明文连接的样本
+            self.timeouts.record(ip, None if tls else connected - start, time.perf_counter() - connected)
+            body = await asyncio.wait_for(reader.read(self.body_bytes), read_timeout) if self.body_bytes else b''
+            return (*parse_head(head), body)
+        except OSError as e:
+            if e.errno in self._exhausted:
+                raise
+            return None
+        except Exception:  # noqa
+            return None
+        finally:
+            if writer is not None:
+                if tls is not None:
+                    tls.remember(str(ip), writer.get_extra_info('ssl_object'))
+                writer.close()
+
+
+class SocketProbe:
+    """阻塞套接字 HTTP/1.1 探测，只发送一行请求并读取响应头与响应体前缀，不经过 requests，供线程工作器使用"""
+
+    def __init__(self, mode, context: ScanContext):
+        self.method = 'GET' if mode == 0 else 'HEAD'
+        self.context = context
+        self.timeouts = context.timeouts
+        self.body_bytes = context.config['body_bytes'] if mode == 0 else 0
+        self.tls = TlsContext.instance()
+
+    def search(self, ip):
+        """探测单个地址并记录结果，识别出型号返回 (ip, model)，否则返回 0，与 ClientFunc.search 一致，
+        地址已在预扫描中计入限速，此处不再取令牌"""
+        start = time.perf_counter()
+        for scheme, port in self.context.endpoints:
+            answer = self.fetch(ip, scheme, port)
+            if answer is not None:
+                model = self.context.fingerprint.classify(*answer)
+                if model is not None:
+                    self.context.hit(ip, model, time.perf_counter() - start)
+                    return ip, model
+                break
+        self.context.miss(ip)
+        return 0
+
+    def fetch(self, ip, scheme, port):
+        """请求单个端口，返回 (状态码, 响应头, 响应体前缀)，无应答返回 None"""
+        tls = self.tls if scheme == 'https' else None
+        connect_timeout, read_timeout = self.timeouts.get(ip)
+        sock = socket.socket(socket.AF_INET6 if ip.version == 6 else socket.AF_INET, socket.SOCK_STREAM)
+        if not self.context.track(sock):
+            sock.close()
+            return None
+        try:
+            start = time.perf_counter()
+            sock.settimeout(connect_timeout)
+            sock.connect(sock_address(ip, port))
+            connected = time.perf_counter()
+            if tls is not None:
+                # 包装后原套接字失效，改为登记 TLS 套接字
+                self.context.untrack(sock)
+                sock = tls.wrap_socket(sock, server_hostname=str(ip))
+                if not self.context.track(sock):
+                    return None
+            sock.settimeout(read_timeout)
+            sock.sendall(build_request(ip, self.method, port=port))
+            data = b''
+            while b'\r\n\r\n' not in data and len(data) < 65536:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            head, sep, body = data.partition(b'\r\n\r\n')
+            if not sep:
+                return None
+            # TLS 握手计入连接耗时会抬高连接超时，只记录明文连接的样本
+            self.timeouts.record(ip, None if tls else connected - start, time.perf_counter() - connected)
+            if len(body) < self.body_bytes:
+                try:  # 与事件循环引擎一致，响应体只再读取一次
+                    body += sock.recv(self.body_bytes - len(body))
+                except OSError:
+                    pass
+            return (*parse_head(head), body[:self.body_bytes])
+        except OSError:
+            return None
+        finally:
+            self.context.untrack(sock)
+            sock.close()
+
+
+SWEEP_BATCH = 500  # 预扫描同时在途的连接数量
+HTTP_WORKERS = 5  # 预扫描后并行 HTTP 探测的工作器数量
+
+
+class ConnectSweep:
+    """非阻塞 TCP 连接预扫描，通过 selectors（Linux 下为 epoll）批量检测端口是否开放"""
+
+    # 非阻塞 connect 正在进行中的返回码，Windows 为 WSAEWOULDBLOCK
+    _pending = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}
+
+    def __init__(self, context: ScanContext, batch=SWEEP_BATCH):
+        self.context = context
+        self.timeouts = context.timeouts
+        self.limiter = context.limiter
+        self.ports = list(dict.fromkeys(port for _, port in context.endpoints))
+        self.batch = batch  # Windows 下 select 最多 512 个套接字
+        self._stop_flag = False
+
+    def stop(self):
+        """响应停止信号"""
+        self._stop_flag = True
+
+    def run(self, hosts, on_open, on_closed):
+        """阻塞运行直到目标耗尽或被停止，任一端口开放的地址交给 on_open(ip, release)，其余交给 on_closed，
+        开放地址的子网名额由接收方在 HTTP 探测结束后调用 release(ip) 归还"""
+        gate = self.context.gate(hosts)
+        selector = selectors.DefaultSelector()
+        pending = {}  # socket: (ip, start, deadline)
+        waiting = {}  # ip: 尚未完成的端口数量，已有端口开放的地址不在其中
+        exhausted = False
+        try:
+            while not self._stop_flag and (pending or not exhausted):
+                # 补充在途连接，令牌不足时先处理在途连接
+                wait = 0
+                blocked = False
+                while not exhausted and len(pending) < self.batch:
+                    wait = self.limiter.poll()
+                    if wait:
+                        break
+                    try:
+                        ip = gate.take()
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if ip is None:  # 子网名额已满，先处理在途连接
+                        blocked = True
+                        break
+                    # 同一地址的各端口同时连接，第一个开放的端口决定结果
+                    socks = [sock for sock in (self._connect(ip, port) for port in self.ports) if sock is not None]
+                    if not socks:
+                        self._closed(ip, on_closed)
+                        gate.release(ip)
+                        continue
+                    waiting[ip] = len(socks)
+                    start = time.monotonic()
+                    deadline = start + self.timeouts.get(ip)[0]
+                    for sock in socks:
+                        pending[sock] = (ip, start, deadline)
+                        selector.register(sock, selectors.EVENT_WRITE)
+                if not pending:
+                    if wait:
+                        time.sleep(wait)
+                    elif blocked:  # 名额都在 HTTP 探测中，等待归还
+                        gate.wait()
+                    continue
+                # 等待可写事件，可写即连接完成（成功或失败）
+                for key, _ in selector.select(timeout=min(wait, 0.05) if wait else 0.05):
+                    sock = key.fileobj
+                    ip, start, _ = pending.pop(sock)
+                    selector.unregister(sock)
+                    state = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    sock.close()
+                    if ip not in waiting:
+                        continue
+                    # 端口开放或被拒绝都说明主机在线，均可作为 RTT 样本
+                    if state in (0, errno.ECONNREFUSED, 10061):
+                        self.timeouts.record(ip, connect=time.monotonic() - start)
+                    if state == 0:
+                        del waiting[ip]
+                        on_open(ip, gate.release)
+                    else:
+                        self._failed(ip, waiting, on_closed, gate)
+                # 超时未完成的视为不可达
+                now = time.monotonic()
+                for sock in [s for s, (_, _, deadline) in pending.items() if deadline <= now]:
+                    ip, _, _ = pending.pop(sock)
+                    selector.unregister(sock)
+                    sock.close()
+                    if ip in waiting:
+                        self._failed(ip, waiting, on_closed, gate)
+        finally:
+            for sock in pending:
+                sock.close()
+            selector.close()
+
+    def _failed(self, ip, waiting, on_closed, gate):
+        """一个端口连接失败，全部端口都失败时地址计为不可达"""
+        waiting[ip] -= 1
+        if waiting[ip] == 0:
+            del waiting[ip]
+            self._closed(ip, on_closed)
+            gate.release(ip)
+
+    def _closed(self, ip, on_closed):
+        self.context.miss(ip)
+        on_closed(ip)
+
+    def _connect(self, ip, port):
+        sock = socket.socket(socket.AF_INET6 if ip.version == 6 else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            state = sock.connect_ex(sock_address(ip, port))
+        except OSError:
+            state = -1
+        if state not in self._pending:
+            sock.close()
+            return None
+        return sock
@@ -0,0 +1,144 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from .Probe import AsyncProbe, AdaptiveTimeout, Fingerprint, RateLimiter, ScanContext
+from .Target import merge_intervals, subtract_intervals, to_address, to_value
+
+
+class ShardContext(ScanContext):
+    """子进程内的扫描状态，只收集识别结果，持久化记录由主进程完成"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.found = []  # [(整数编号, model, latency)]
+
+    def hit(self, ip, model, latency=None):
+        self.found.append((to_value(ip), model, latency))
+
+    def miss(self, ip):
+        pass
+
+
+_context = None  # 子进程的扫描状态，由 _init 创建，在该进程处理的各批次间共享超时统计
+_stop = None  # 主进程的停止事件，各子进程共用
+_probe = None  # 子进程中正在运行的探测引擎
+
+
+def _watch():
+    """子进程中等待停止事件，事件置位后立即取消正在探测的批次"""
+    _stop.wait()
+    probe = _probe
+    if probe is not None:
+        probe.stop()
+
+
+def _init(config, model, processes, stop):
+    global _context, _stop
+    _stop = stop
+    threading.Thread(target=_watch, daemon=True).start()
+    # 子网并发上限由主进程分发批次时统一控制，子进程内不再重复限制
+    config = dict(config, subnet_concurrency=0)
+    # 全局限速平均分给各进程
+    limiter = RateLimiter(config['rate_limit'] / processes, config['rate_burst'] // processes, report=0)
+    _context = ShardContext(config, Fingerprint(model, config['fingerprints']), AdaptiveTimeout(config),
+                            limiter=limiter)
+
+
+def scan_chunk(intervals, mode, concurrency, scopes=None):
+    """子进程入口，探测一批地址，scopes 为其中链路本地 IPv6 地址的接口，返回 (该批区间, [(整数编号, model, latency)])"""
+    global _probe
+    _context.found = []
+    scopes = scopes or {}
+    hosts = (to_address(value, scopes.get(value)) for start, end in intervals for value in range(start, end + 1))
+    _probe = AsyncProbe(mode, _context, concurrency)
+    if _stop.is_set():  # 已停止时排队中的批次不再探测
+        _probe.stop()
+    try:
+        _probe.run(hosts, lambda result: None)
+    finally:
+        _probe = None
+    return intervals, _context.found
+
+
+class ShardScan:
+    """多进程分片探测引擎，目标按批分给各进程，每个进程运行独立的事件循环探测并成批返回结果"""
+
+    def __init__(self, mode, context: ScanContext, processes=0, chunk=1024):
+        self.mode = mode  # 子进程内的探测方式，同 AsyncProbe
+        self.context = context
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk = chunk
+        self.scopes = {}  # 已分发的链路本地 IPv6 地址的接口，结果按其还原为地址
+        self._stop_flag = False
+        self._stop_event = None  # 通知子进程停止的事件，run 中创建
+
+    def stop(self):
+        """响应停止信号，不再分发新批次，并通知各子进程立即取消正在探测的批次"""
+        self._stop_flag = True
+        event = self._stop_event
+        if event is not None:
+            event.set()
+
+    def run(self, hosts, callback):
+        """阻塞运行直到目标耗尽或被停止，每批结果以 (完成数量, [(ip, model)]) 通过 callback 返回"""
+        # 子网名额在分发时占用、整批返回后释放，上限对所有进程全局生效
+        gate = self.context.gate(hosts)
+        config = self.context.config
+        concurrency = max(1, min(config['async_concurrency'], self.chunk))
+        # 统一使用 spawn，避免在多线程的 GUI 进程中 fork
+        spawn = multiprocessing.get_context('spawn')
+        self._stop_event = spawn.Event()
+        if self._stop_flag:
+            return
+        executor = concurrent.futures.ProcessPoolExecutor(
+            self.processes, spawn,
+            initializer=_init, initargs=(config, self.context.fingerprint.fallback, self.processes, self._stop_event))
+        pending = set()
+        exhausted = False
+        try:
+            while not self._stop_flag and (pending or not exhausted):
+                # 每个进程保持两批在途，一批探测时下一批已在队列中
+                while not exhausted and len(pending) < self.processes * 2:
+                    chunk, exhausted = self._take(gate)
+                    if not chunk:
+                        break
+                    intervals = merge_intervals((to_value(ip), to_value(ip)) for ip in chunk)
+                    scopes = {to_value(ip): ip.scope_id for ip in chunk if ip.version == 6 and ip.scope_id}
+                    self.scopes.update(scopes)
+                    pending.add(executor.submit(scan_chunk, intervals, self.mode, concurrency, scopes))
+                done, pending = concurrent.futures.wait(pending, 0.2, concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    intervals, found = future.result()
+                    for start, end in intervals:
+                        for value in range(start, end + 1):
+                            gate.release(to_address(value))
+                    callback(self._record(intervals, found))
+        finally:
+            self._stop_event.set()  # 目标耗尽时同样通知子进程，结束其等待线程
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _take(self, gate):
+        """从子网闸门取出一批地址，返回 (该批地址, 是否已全部取完)，子网名额已满时该批可能不足 chunk 个"""
+        chunk = []
+        while len(chunk) < self.chunk:
+            try:
+                ip = gate.take()
+            except StopIteration:
+                return chunk, True
+            if ip is None:  # 其余地址需等在途批次返回后释放名额
+                break
+            chunk.append(ip)
+        return chunk, False
+
+    def _record(self, intervals, found):
+        """在主进程中记录一批结果，返回 (完成数量, [(ip, model)])，ip 与其他探测引擎一致为地址对象"""
+        found = [(to_address(value, self.scopes.get(value)), model, latency) for value, model, latency in found]
+        for ip, model, latency in found:
+            self.context.hit(ip, model, latency)
+        hits = merge_intervals((to_value(ip), to_value(ip)) for ip, _, _ in found)
+        for start, end in subtract_intervals(intervals, hits):
+            for value in range(start, end + 1):
+                self.context.miss(to_address(value))
+        count = sum(end - start + 1 for start, end in intervals)
+        return count, [(ip, model) for ip, model, _ in found]
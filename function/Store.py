@@ -0,0 +1,279 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from .MessageBox import warning
+from .Target import IntervalSet, subtract_intervals, to_value
+
+DB_FILE = 'toolsbox.db'
+CHECKPOINT_FILE = 'toolsbox_scan.json'
+
+
+def data_path(name):
+    """程序数据文件路径，与注册文件同在 APPDATA 目录"""
+    return os.path.join(os.environ.get('APPDATA', os.path.expanduser('~')), name)
+
+
+def connect(path=None):
+    """打开本地数据库，每个线程需使用独立的连接"""
+    conn = sqlite3.connect(path or data_path(DB_FILE))
+    conn.execute('CREATE TABLE IF NOT EXISTS negative (ip TEXT PRIMARY KEY, ts REAL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS devices (ip TEXT PRIMARY KEY, model INTEGER, last_seen REAL, latency REAL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS subnets (subnet TEXT PRIMARY KEY, probed INTEGER, hits INTEGER, '
+                 'latency REAL, rtt REAL, timeout REAL, updated REAL)')
+    return conn
+
+
+class NegativeCache:
+    """无响应主机的负缓存，TTL 内无响应过的地址在搜索中延后或跳过"""
+
+    def __init__(self, ttl, path=None):
+        self.ttl = ttl
+        self.path = path
+        self.lock = threading.Lock()
+        self._dead = set()  # 本次搜索无响应的地址
+        self._alive = set()  # 本次搜索有响应的地址
+
+    def load(self):
+        """读取 TTL 内无响应的地址，返回整数编号集合，见 Target.to_value"""
+        conn = connect(self.path)
+        rows = conn.execute('SELECT ip FROM negative WHERE ts >= ?', (time.time() - self.ttl,)).fetchall()
+        conn.close()
+        return {to_value(ip) for ip, in rows}
+
+    def add(self, ip):
+        with self.lock:
+            self._dead.add(str(ip))
+
+    def discard(self, ip):
+        with self.lock:
+            self._alive.add(str(ip))
+
+    def flush(self):
+        """写入本次搜索的结果，并清理过期记录"""
+        with self.lock:
+            dead, self._dead = self._dead - self._alive, set()
+            alive, self._alive = self._alive, set()
+        now = time.time()
+        conn = connect(self.path)
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO negative (ip, ts) VALUES (?, ?)', [(ip, now) for ip in dead])
+            conn.executemany('DELETE FROM negative WHERE ip = ?', [(ip,) for ip in alive])
+            conn.execute('DELETE FROM negative WHERE ts < ?', (now - self.ttl,))
+        conn.close()
+        return len(dead), len(alive)
+
+
+class DeviceStore:
+    """已发现设备的本地记录，保存型号、最后发现时间与响应延迟"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self._found = {}  # ip: (model, last_seen, latency)
+
+    def load(self):
+        """读取全部已知设备，返回 {整数编号: (model, last_seen, latency)}"""
+        conn = connect(self.path)
+        rows = conn.execute('SELECT ip, model, last_seen, latency FROM devices').fetchall()
+        conn.close()
+        return {to_value(ip): (model, last_seen, latency) for ip, model, last_seen, latency in rows}
+
+    def add(self, ip, model, latency=None):
+        with self.lock:
+            self._found[str(ip)] = (model, time.time(), latency)
+
+    def flush(self):
+        """写入本次搜索发现的设备"""
+        with self.lock:
+            found, self._found = self._found, {}
+        conn = connect(self.path)
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO devices (ip, model, last_seen, latency) VALUES (?, ?, ?, ?)',
+                             [(ip, *value) for ip, value in found.items()])
+        conn.close()
+        return len(found)
+
+
+class SubnetStore:
+    """各子网最近一次搜索的统计，供搜索前估算耗时使用"""
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def load(self):
+        """读取全部子网统计，返回 {subnet: (probed, hits, latency, rtt, timeout, updated)}"""
+        conn = connect(self.path)
+        rows = conn.execute('SELECT subnet, probed, hits, latency, rtt, timeout, updated FROM subnets').fetchall()
+        conn.close()
+        return {subnet: tuple(values) for subnet, *values in rows}
+
+    def save(self, rows):
+        """写入本次搜索的子网统计，rows 同 Probe.SubnetStats.rows"""
+        now = time.time()
+        conn = connect(self.path)
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO subnets (subnet, probed, hits, latency, rtt, timeout, updated) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', [(*row, now) for row in rows])
+        conn.close()
+        return len(rows)
+
+
+class ResultSink:
+    """搜索结果的流式输出，每发现一台设备追加一行，按扩展名使用 CSV 或 JSONL 格式，攒满一批再写入，内存中只保留未写入的一批"""
+    FIELDS = ('ip', 'model', 'latency', 'time')
+
+    def __init__(self, path, batch=100):
+        self.path = path
+        self.format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        self.batch = batch
+        self.lock = threading.Lock()  # 保护尚未写入的一批，只在追加与取出时持有
+        self.writing = threading.Lock()  # 保证各批按顺序写入文件
+        self.written = 0
+        self._rows = []  # [(ip, model, latency, time)] 尚未写入的结果
+
+    def add(self, ip, model, latency=None):
+        """记录一台设备，latency 为响应耗时（秒）"""
+        row = (str(ip), model, round(latency, 4) if latency is not None else None,
+               datetime.now().isoformat(timespec='milliseconds'))
+        with self.lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.batch
+        if full:
+            self.flush()
+
+    def flush(self):
+        """写入尚未写入的结果，返回累计写入的行数"""
+        with self.writing:
+            with self.lock:
+                rows, self._rows = self._rows, []
+            self._write(rows)
+        return self.written
+
+    def _write(self, rows):
+        if not rows:
+            return
+        try:
+            header = self.format == 'csv' and (not os.path.exists(self.path) or os.path.getsize(self.path) == 0)
+            with open(self.path, 'a', encoding='UTF-8', newline='') as file:
+                if self.format == 'csv':
+                    writer = csv.writer(file)
+                    if header:
+                        writer.writerow(self.FIELDS)
+                    writer.writerows(rows)
+                else:
+                    file.writelines(json.dumps(dict(zip(self.FIELDS, row))) + '\n' for row in rows)
+        except OSError as e:
+            warning(f'结果文件 {self.path} 写入失败，丢弃 {len(rows)} 条结果：{e}')
+            return
+        self.written += len(rows)
+
+
+class ScanCheckpoint:
+    """搜索断点，定期保存已完成的区间与已发现的设备，用于继续上次中断的搜索"""
+
+    def __init__(self, specs, mode, model, intervals, done=(), found=(), path=None, order=None):
+        self.specs = specs
+        self.mode = mode
+        self.model = model
+        self.intervals = intervals  # 全部目标区间
+        self.done = IntervalSet(done)  # 已完成的地址，顺序搜索使用
+        self.found = list(found)  # [[ip, model]]
+        self.path = path or data_path(CHECKPOINT_FILE)
+        self.lock = threading.Lock()
+        # 乱序搜索的遍历顺序与进度，见 track
+        order = order or {}
+        self.key = order.get('key')  # 排列的密钥，None 表示顺序搜索
+        self.first = order.get('first', [])  # 优先探测的地址
+        self.deferred = order.get('deferred', [])  # 延后探测的地址
+        self.position = order.get('position', 0)  # 小于该遍历序号的均已完成
+        self.ahead = set(order.get('ahead', ()))  # 不小于 position 的已完成遍历序号
+        self._locate = None  # 地址到遍历序号的映射，TargetDispenser.position
+
+    @classmethod
+    def load(cls, path=None):
+        """读取上次的断点，没有断点时返回 None"""
+        path = path or data_path(CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='UTF-8') as file:
+            data = json.load(file)
+        return cls(data['specs'], data['mode'], data['model'], [tuple(each) for each in data['intervals']],
+                   data['done'], data['found'], path, data.get('order'))
+
+    def track(self, dispenser):
+        """按分发器的遍历方式记录进度，在分发器完成 prioritize 与 defer 之后调用
+        顺序搜索完成的地址大致连续，直接合并为区间；乱序搜索完成的地址分散在各处，
+        改为记录遍历序号，连续完成的部分只保存前缀长度，其后零散完成的序号单独保存
+        """
+        if not dispenser.shuffle:
+            # 跳过的地址记为已完成，继续搜索时不再重复探测
+            for value in dispenser.skipped:
+                self.done.add(value)
+            return
+        if self.key is None:
+            # 新的搜索，移出排列的地址在区间部分的序号记为已完成，由其优先或延后的序号代替
+            self.key, self.first, self.deferred = dispenser.key, list(dispenser.first), sorted(dispenser.deferred)
+            with self.lock:
+                self.ahead.update(dispenser.slot(value) for value in self.first + self.deferred + dispenser.skipped)
+                self._advance()
+        self._locate = dispenser.position
+
+    def add(self, ip, model=None):
+        """记录一个已完成的地址，model 不为 None 时同时记录为已发现的设备"""
+        if self._locate is None:
+            self.done.add(to_value(ip))
+        else:
+            index = self._locate(to_value(ip))
+            with self.lock:
+                self.ahead.add(index)
+                self._advance()
+        if model is not None:
+            with self.lock:
+                self.found.append([str(ip), model])
+
+    def _advance(self):
+        while self.position in self.ahead:
+            self.ahead.discard(self.position)
+            self.position += 1
+
+    def count(self):
+        """已完成的地址数量"""
+        if self.key is None:
+            return self.done.count()
+        with self.lock:
+            return self.position + len(self.ahead) - len(self.first) - len(self.deferred)
+
+    def remaining(self):
+        """顺序搜索尚未完成的区间"""
+        return subtract_intervals(self.intervals, self.done.intervals())
+
+    def save(self):
+        with self.lock:
+            found = list(self.found)
+            order = None if self.key is None else {
+                'key': self.key,
+                'first': self.first,
+                'deferred': self.deferred,
+                'position': self.position,
+                'ahead': sorted(self.ahead),
+            }
+        data = {
+            'specs': self.specs,
+            'mode': self.mode,
+            'model': self.model,
+            'intervals': self.intervals,
+            'done': self.done.intervals(),
+            'found': found,
+            'order': order,
+            'time': time.time(),
+        }
+        # 先写临时文件再替换，避免写入过程中崩溃导致断点损坏
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='UTF-8') as file:
+            json.dump(data, file)
+        os.replace(temp, self.path)
@@ -0,0 +1,437 @@
+import bisect
+import ipaddress
+import random
+import re
+import threading
+
+
+V6_BASE = 1 << 32  # IPv6 地址整数编号的起点，IPv4 与 IPv6 共用一个整数空间，区间运算不区分版本
+
+
+def to_value(ip):
+    """地址的整数编号，IPv4 为地址本身的整数值，IPv6 为 V6_BASE 加地址的整数值，不含接口标识"""
+    if isinstance(ip, str):
+        ip = ipaddress.ip_address(ip)
+    return int(ip) if ip.version == 4 else V6_BASE + int(ip)
+
+
+def to_address(value, scope=None):
+    """整数编号还原为地址，scope 为链路本地 IPv6 地址的接口名称或序号"""
+    if value < V6_BASE:
+        return ipaddress.IPv4Address(value)
+    ip = ipaddress.IPv6Address(value - V6_BASE)
+    return ipaddress.IPv6Address(f'{ip}%{scope}') if scope else ip
+
+
+def url_host(ip):
+    """URL 与 Host 头中的地址，IPv6 加方括号并去掉接口标识"""
+    if isinstance(ip, str):
+        ip = ipaddress.ip_address(ip)
+    if ip.version == 4:
+        return str(ip)
+    return f'[{ipaddress.IPv6Address(int(ip))}]'
+
+
+def subnet_of(ip, prefix, prefix6):
+    """地址所在的子网，IPv4 按 prefix 划分，IPv6 按 prefix6 划分，不含接口标识"""
+    if isinstance(ip, str):
+        ip = ipaddress.ip_address(ip)
+    if ip.version == 4:
+        return ipaddress.IPv4Network((int(ip), prefix), strict=False)
+    return ipaddress.IPv6Network((int(ip), prefix6), strict=False)
+
+
+def network_interval(network: ipaddress.IPv4Network | ipaddress.IPv6Network):
+    """网段的可用主机区间（闭区间，整数编号），/31 与 /32 没有网络地址和广播地址之分，IPv6 只去掉子网路由器任播地址"""
+    start = to_value(network.network_address)
+    end = to_value(network.broadcast_address)
+    if network.prefixlen < network.max_prefixlen - 1:
+        start, end = start + 1, end - (network.version == 4)
+    return start, end
+
+
+def _scoped(token):
+    """带接口标识的单个链路本地 IPv6 地址，如 fe80::1%eth0，返回 (整数编号, 接口)"""
+    address, _, scope = token.partition('%')
+    if not scope or any(c in address for c in '/-'):
+        raise ValueError('接口标识只能用于单个地址，如 fe80::1%eth0')
+    ip = ipaddress.ip_address(address)
+    if ip.version != 6 or not ip.is_link_local:
+        raise ValueError('接口标识只能用于链路本地 IPv6 地址')
+    return to_value(ip), scope
+
+
+def parse_spec(text: str, hosts=True):
+    """解析目标描述，支持任意数量的 CIDR、地址段与单个地址，以逗号、分号或空白分隔，IPv4 与 IPv6 均可
+    例：192.168.1.0/24, 10.0.0.1-10.0.0.50, 10.0.1.1-20, 172.16.0.8, fd00::/120, fd00::1-ff, fe80::1%eth0
+    :param hosts: 为 True 时 CIDR 只取可用主机区间（搜索目标），为 False 时取整个网段（包含与排除列表）
+    :return: [(start, end)] 未合并的闭区间，链路本地地址的接口见 parse_scopes
+    """
+    intervals = []
+    for token in re.split(r'[,;\s]+', text.strip()):
+        if not token:
+            continue
+        try:
+            if '%' in token:
+                value, _ = _scoped(token)
+                intervals.append((value, value))
+            elif '/' in token:
+                network = ipaddress.ip_network(token, strict=False)
+                if hosts:
+                    intervals.append(network_interval(network))
+                else:
+                    intervals.append((to_value(network.network_address), to_value(network.broadcast_address)))
+            elif '-' in token:
+                first, last = token.split('-', 1)
+                start = ipaddress.ip_address(first)
+                separator = '.' if start.version == 4 else ':'
+                if separator not in last:  # 简写形式，只给出末段
+                    last = first.rsplit(separator, 1)[0] + separator + last
+                end = ipaddress.ip_address(last)
+                if end.version != start.version:
+                    raise ValueError('起止地址版本不同')
+                if end < start:
+                    raise ValueError('结束地址小于起始地址')
+                intervals.append((to_value(start), to_value(end)))
+            else:
+                value = to_value(token)
+                intervals.append((value, value))
+        except ValueError as e:
+            raise ValueError(f'目标格式错误：{token}，{e}')
+    return intervals
+
+
+def parse_scopes(text: str):
+    """目标描述中带接口标识的链路本地地址，返回 {整数编号: 接口}，格式错误由 parse_spec 报告"""
+    scopes = {}
+    for token in re.split(r'[,;\s]+', text.strip()):
+        if '%' in token:
+            value, scope = _scoped(token)
+            scopes[value] = scope
+    return scopes
+
+
+def split_wide(intervals, limit):
+    """拆出大于 limit 个地址的 IPv6 区间，返回 (逐个生成的区间, 过大的区间)，IPv6 网段通常无法逐个探测"""
+    narrow, wide = [], []
+    for start, end in intervals:
+        if start >= V6_BASE and end - start + 1 > limit:
+            wide.append((start, end))
+        else:
+            narrow.append((start, end))
+    return narrow, wide
+
+
+def merge_intervals(intervals):
+    """合并重叠与相邻的区间，返回有序且互不重叠的区间列表"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(intervals, removed):
+    """从区间中减去另一组区间，两者均需为有序且互不重叠的区间"""
+    result = []
+    index = 0
+    for start, end in intervals:
+        # 跳过完全位于当前区间左侧的待减区间
+        while index < len(removed) and removed[index][1] < start:
+            index += 1
+        cursor = start
+        probe = index
+        while probe < len(removed) and removed[probe][0] <= end:
+            cut_start, cut_end = removed[probe]
+            if cut_start > cursor:
+                result.append((cursor, cut_start - 1))
+            cursor = max(cursor, cut_end + 1)
+            probe += 1
+        if cursor <= end:
+            result.append((cursor, end))
+    return result
+
+
+def load_spec_file(path):
+    """读取包含或排除列表文件，每行可写一个或多个目标，# 之后为注释，CIDR 按整个网段计，返回未合并的区间"""
+    intervals = []
+    with open(path, 'r', encoding='UTF-8') as file:
+        for line in file:
+            intervals += parse_spec(line.split('#', 1)[0], hosts=False)
+    return intervals
+
+
+class IntervalTree:
+    """静态区间树，以合并后的有序区间与二分查找实现，适合大量区间的包含判断、求交与相减"""
+
+    def __init__(self, intervals=()):
+        self.intervals = merge_intervals(intervals)
+        self.starts = [start for start, _ in self.intervals]
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __contains__(self, value):
+        index = bisect.bisect_right(self.starts, value) - 1
+        return index >= 0 and value <= self.intervals[index][1]
+
+    def _overlapping(self, start, end):
+        """与 [start, end] 相交的区间"""
+        index = bisect.bisect_right(self.starts, start) - 1
+        if index < 0 or self.intervals[index][1] < start:
+            index += 1
+        while index < len(self.intervals) and self.intervals[index][0] <= end:
+            yield self.intervals[index]
+            index += 1
+
+    def subtract(self, intervals):
+        """从区间中减去树中的区间，返回有序且互不重叠的区间列表"""
+        result = []
+        for start, end in merge_intervals(intervals):
+            cursor = start
+            for cut_start, cut_end in self._overlapping(start, end):
+                if cut_start > cursor:
+                    result.append((cursor, cut_start - 1))
+                cursor = max(cursor, cut_end + 1)
+            if cursor <= end:
+                result.append((cursor, end))
+        return result
+
+    def intersect(self, intervals):
+        """区间与树中区间的交集，返回有序且互不重叠的区间列表"""
+        result = []
+        for start, end in merge_intervals(intervals):
+            for keep_start, keep_end in self._overlapping(start, end):
+                result.append((max(start, keep_start), min(end, keep_end)))
+        return result
+
+
+class IntervalSet:
+    """线程安全的地址集合，以合并后的有序区间保存，适合记录大致按顺序完成的地址"""
+
+    def __init__(self, intervals=()):
+        merged = merge_intervals(intervals)
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+        self.lock = threading.Lock()
+
+    def add(self, value: int):
+        with self.lock:
+            index = bisect.bisect_right(self.starts, value) - 1
+            if index >= 0 and value <= self.ends[index]:
+                return
+            left = index >= 0 and self.ends[index] == value - 1
+            right = index + 1 < len(self.starts) and self.starts[index + 1] == value + 1
+            if left and right:
+                self.ends[index] = self.ends[index + 1]
+                del self.starts[index + 1], self.ends[index + 1]
+            elif left:
+                self.ends[index] = value
+            elif right:
+                self.starts[index + 1] = value
+            else:
+                self.starts.insert(index + 1, value)
+                self.ends.insert(index + 1, value)
+
+    def intervals(self):
+        with self.lock:
+            return list(zip(self.starts, self.ends))
+
+    def count(self):
+        with self.lock:
+            return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+
+class Permutation:
+    """[0, size) 上的伪随机全周期排列，平衡 Feistel 网络加循环行走，只保存轮密钥，不生成排列本身"""
+
+    def __init__(self, size, key=None, rounds=4):
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        bits += bits & 1  # Feistel 两半等宽，定义域为 4 的幂，不超过 size 的 4 倍
+        self.half = bits // 2
+        self.mask = (1 << self.half) - 1
+        rng = random.Random(key)
+        self.keys = [rng.getrandbits(32) for _ in range(rounds)]
+
+    def _round(self, value, key):
+        value = ((value ^ key) * 0x45D9F3B) & 0xFFFFFFFF
+        return (value ^ (value >> 16)) & self.mask
+
+    def _encrypt(self, value):
+        left, right = value >> self.half, value & self.mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self.half) | right
+
+    def _decrypt(self, value):
+        left, right = value >> self.half, value & self.mask
+        for key in reversed(self.keys):
+            left, right = right ^ self._round(left, key), left
+        return (left << self.half) | right
+
+    def __getitem__(self, index):
+        """第 index 个位置上的值，超出范围的结果继续加密直到落回 [0, size)"""
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def index(self, value):
+        """value 所在的位置，与 __getitem__ 互逆，沿加密的反方向行走直到落回 [0, size)"""
+        index = self._decrypt(value)
+        while index >= self.size:
+            index = self._decrypt(index)
+        return index
+
+    def __iter__(self):
+        return (self[index] for index in range(self.size))
+
+    def __len__(self):
+        return self.size
+
+
+class TargetDispenser:
+    """线程安全的目标分发器，所有工作器共用一把锁从同一处取下一个地址"""
+
+    def __init__(self, intervals: list[tuple[int, int]], shuffle=False, scopes=None, key=None):
+        self.intervals = merge_intervals(intervals)  # [(start, end)] 有序互不重叠的闭区间，整数编号，见 to_value
+        self.scopes = scopes or {}  # 链路本地 IPv6 地址的接口，{整数编号: 接口}
+        self.starts = [start for start, _ in self.intervals]
+        self.offsets = []  # 各区间在区间拼接后的起始序号
+        self.size = 0
+        for start, end in self.intervals:
+            self.offsets.append(self.size)
+            self.size += end - start + 1
+        self.total = self.size
+        self.shuffle = shuffle  # 按伪随机排列遍历，使探测均匀分散到各子网
+        self.key = random.getrandbits(64) if key is None else key  # 排列的密钥，相同密钥得到相同的遍历顺序
+        self.permutation = Permutation(self.size, self.key) if shuffle else None
+        self.dispensed = 0
+        self.first = []  # 优先探测的地址
+        self.deferred = []  # 延后到最后探测的地址
+        self.skipped = []  # 跳过不探测的地址
+        self.start = 0  # 乱序遍历从该遍历序号继续，见 resume
+        self.completed = set()  # 继续时跳过的已完成遍历序号
+        self.keep = None  # 继续时只探测其中的地址，IntervalTree
+        self._moved = set()  # 已移出顺序遍历的地址
+        self._index = None  # 优先与延后地址的遍历序号，{整数编号: 序号}
+        self.lock = threading.Lock()
+        self._walker = self._walk()
+
+    def prioritize(self, values):
+        """将目标中属于 values 的地址提前到最先探测，返回命中数量"""
+        hit = [v for v in self._within(values) if v not in self._moved]
+        self.first += hit
+        self._moved.update(hit)
+        return len(hit)
+
+    def defer(self, values, skip=False):
+        """将目标中属于 values 的地址延后到最后探测，skip 为 True 时直接跳过，返回命中数量"""
+        hit = [v for v in self._within(values) if v not in self._moved]
+        self._moved.update(hit)
+        if skip:
+            self.total -= len(hit)
+            self.skipped += hit
+        else:
+            self.deferred += hit
+        return len(hit)
+
+    def _within(self, values):
+        """values 中落在目标区间内的地址，保持原有顺序并去重"""
+        result = []
+        for value in dict.fromkeys(values):
+            index = bisect.bisect_right(self.starts, value) - 1
+            if index >= 0 and value <= self.intervals[index][1]:
+                result.append(value)
+        return result
+
+    @classmethod
+    def from_network(cls, network: ipaddress.IPv4Network | ipaddress.IPv6Network, shuffle=False):
+        return cls([network_interval(network)], shuffle)
+
+    @classmethod
+    def from_spec(cls, text: str, shuffle=False):
+        return cls(parse_spec(text), shuffle)
+
+    def position(self, value):
+        """地址的遍历序号：优先探测的地址在前，其次为区间内地址按遍历顺序的序号，最后为延后探测的地址
+        乱序遍历时序号只由 key 与优先、延后的地址决定，断点据此记录进度，需在 prioritize 与 defer 之后调用
+        """
+        if self._index is None:
+            base = len(self.first) + self.size
+            index = {value: i for i, value in enumerate(self.first)}
+            index.update((value, base + i) for i, value in enumerate(sorted(self.deferred)))
+            self._index = index
+        index = self._index.get(value)
+        return self.slot(value) if index is None else index
+
+    def slot(self, value):
+        """地址在区间部分的遍历序号，不考虑优先与延后"""
+        position = bisect.bisect_right(self.starts, value) - 1
+        index = self.offsets[position] + value - self.starts[position]
+        return len(self.first) + (self.permutation.index(index) if self.shuffle else index)
+
+    def resume(self, start, completed, keep=None):
+        """乱序遍历从断点继续，跳过序号小于 start 与 completed 中的地址，keep 不为空时只探测其中的地址
+        :param keep: IntervalTree，继续时重新应用的包含与排除列表
+        """
+        self.start, self.completed, self.keep = start, set(completed), keep
+        total = len(self.first) + self.size + len(self.deferred) - start - len(self.completed)
+        if keep is not None:
+            for begin, end in keep.subtract(self.intervals):
+                for value in range(begin, end + 1):
+                    index = self.position(value)
+                    if index >= start and index not in self.completed:
+                        total -= 1
+        self.total = total
+
+    def _ordered(self):
+        for start, end in self.intervals:
+            yield from range(start, end + 1)
+
+    def _shuffled(self, start=0):
+        # 排列作用于区间拼接后的序号，再按各区间的起始序号映射回地址
+        for index in range(start, self.size):
+            index = self.permutation[index]
+            position = bisect.bisect_right(self.offsets, index) - 1
+            yield self.starts[position] + index - self.offsets[position]
+
+    def _sequence(self):
+        """按遍历顺序给出 (遍历序号, 整数编号)，从 start 开始，start 仅用于乱序遍历"""
+        first = len(self.first)
+        for index in range(self.start, first):
+            yield index, self.first[index]
+        if self.shuffle:
+            values = enumerate(self._shuffled(max(self.start - first, 0)), max(self.start, first))
+        else:
+            values = enumerate(self._ordered(), first)
+        for index, value in values:
+            if value not in self._moved:
+                yield index, value
+        base = first + self.size
+        for index, value in enumerate(sorted(self.deferred), base):
+            if index >= self.start:
+                yield index, value
+
+    def _walk(self):
+        scopes, completed, keep = self.scopes, self.completed, self.keep
+        for index, value in self._sequence():
+            if index not in completed and (keep is None or value in keep):
+                yield to_address(value, scopes.get(value))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self.lock:
+            ip = next(self._walker)
+            self.dispensed += 1
+        return ip
+
+    def remaining(self):
+        """尚未分发的地址数量"""
+        return self.total - self.dispensed
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from .Probe import AsyncProbe, RateLimiter, ScanContext
+from .Target import TargetDispenser, to_address, to_value
+
+
+def diff_snapshots(old, new):
+    """线性归并比较两轮快照，同一地址型号变化时计为旧设备消失、新设备出现
+    :param old: [(整数编号, model)] 按编号排序
+    :param new: 同 old
+    :return: (新出现, 已消失)，格式同 old
+    """
+    appeared, disappeared = [], []
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i][0] < new[j][0]:
+            disappeared.append(old[i])
+            i += 1
+        elif old[i][0] > new[j][0]:
+            appeared.append(new[j])
+            j += 1
+        else:
+            if old[i][1] != new[j][1]:
+                disappeared.append(old[i])
+                appeared.append(new[j])
+            i += 1
+            j += 1
+    disappeared += old[i:]
+    appeared += new[j:]
+    return appeared, disappeared
+
+
+class WatchScan:
+    """后台持续发现，按周期重复搜索目标，每轮的探测按速率均匀分布在整个周期内，只报告与上一轮相比的变化"""
+
+    def __init__(self, context: ScanContext, interval=300, concurrency=1000):
+        self.context = context
+        self.interval = interval
+        self.concurrency = concurrency
+        self.rounds = 0
+        self._stop_event = threading.Event()
+        self._probe = None
+
+    def stop(self):
+        """响应停止信号，结束当前一轮并不再开始下一轮"""
+        self._stop_event.set()
+        probe = self._probe
+        if probe is not None:
+            probe.stop()
+
+    def run(self, hosts: TargetDispenser, callback):
+        """阻塞运行直到被停止，每轮结束以 (轮次, 新出现 [(ip, model)], 已消失 [(ip, model)]) 通过 callback 返回"""
+        # 每轮的目标数量除以周期即为探测速率，令牌同时从全局限速器获取，全局限速更低时以全局限速为准
+        self.context.limiter = RateLimiter(hosts.total / self.interval, 1, report=0, parent=self.context.limiter)
+        # 结果文件只追加新出现的设备，避免每轮重复记录全部设备
+        sink, self.context.sink = self.context.sink, None
+        snapshot = []  # 上一轮的 [(整数编号, model)]
+        while not self._stop_event.is_set():
+            start = time.monotonic()
+            found = []
+            self._probe = AsyncProbe(0, self.context, self.concurrency)
+            if self._stop_event.is_set():
+                break
+            dispenser = TargetDispenser(hosts.intervals, hosts.shuffle, hosts.scopes)
+            self._probe.run(dispenser, lambda result: result and found.append((to_value(result[0]), result[1])))
+            if self._stop_event.is_set():
+                break
+            found.sort()
+            appeared, disappeared = diff_snapshots(snapshot, found)
+            snapshot = found
+            self.rounds += 1
+            self.context.close()
+            if sink is not None:
+                for value, model in appeared:
+                    sink.add(to_address(value, hosts.scopes.get(value)), model)
+                sink.flush()
+            callback((self.rounds,
+                      [(to_address(value, hosts.scopes.get(value)), model) for value, model in appeared],
+                      [(to_address(value, hosts.scopes.get(value)), model) for value, model in disappeared]))
+            # 探测耗时短于周期时等待到下一轮
+            self._stop_event.wait(max(0.0, start + self.interval - time.monotonic()))
@@ -1,3 +1,4 @@
+import queue
 import time
 import traceback
 from paho.mqtt import client as mqtt
@@ -106,17 +107,126 @@ class WorkerMultiple(QRunnable):
             while not self._stop_flag:
                 with QMutexLocker(self.mutex):
                     iterator = next(self.iterators)
-                result = self.fn(iterator, *self.args, **self.kwargs)
+                try:
+                    result = self.fn(iterator, *self.args, **self.kwargs)
+                finally:
+                    done = getattr(self.iterators, 'done', None)  # 结果队列需在探测结束后归还名额
+                    if done is not None:
+                        done(iterator)
                 self.signals.result.emit(result)
         except StopIteration:
             pass
         except Exception as e:
             self.signals.error.emit((type(e), str(e), traceback.format_exc()))
         finally:
-            time.sleep(0.3)  # 显示等待，避免数据串位
+            if not self._stop_flag:  # 终止时立即结束
+                time.sleep(0.3)  # 显示等待，避免数据串位
             self.signals.finished.emit()
             self.controller.unregister_worker(self)
 
+
+class WorkerAsync(QRunnable):
+    """事件循环工作处理，单个线程内运行探测引擎"""
+    def __init__(self, engine, iterators):
+        super(WorkerAsync, self).__init__()
+        self.engine = engine
+        self.iterators = iterators
+        self.signals = WorkerSignals()
+        self._stop_flag = False
+        self.controller = WorkerController.instance()  # 获取控制器单例‌
+        self.controller.register_worker(self)  # 自动注册
+
+    def stop(self):
+        """响应停止信号"""
+        self._stop_flag = True
+        self.engine.stop()
+
+    def connect(self, fn_result, fn_finish, fn_error):
+        """事件绑定"""
+        self.signals.result.connect(fn_result)
+        self.signals.finished.connect(fn_finish)
+        self.signals.error.connect(fn_error)
+
+    @Slot()
+    def run(self):
+        try:
+            self.engine.run(self.iterators, self.signals.result.emit)
+        except Exception as e:
+            self.signals.error.emit((type(e), str(e), traceback.format_exc()))
+        finally:
+            if not self._stop_flag:  # 终止时立即结束
+                time.sleep(0.3)  # 显示等待，避免数据串位
+            self.signals.finished.emit()
+            self.controller.unregister_worker(self)
+
+
+class HostQueue:
+    """预扫描结果队列，供多个工作器共同取用，关闭后取尽即停止"""
+    _end = object()
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.releases = {}  # 地址: 探测结束后归还子网名额的函数
+
+    def put(self, host, release=None):
+        self.queue.put((host, release))
+
+    def done(self, host):
+        """地址探测结束，归还其子网名额"""
+        release = self.releases.pop(host, None)
+        if release is not None:
+            release(host)
+
+    def close(self):
+        self.queue.put(self._end)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self.queue.get()
+        if item is self._end:
+            self.queue.put(self._end)  # 放回结束标记，通知其他工作器
+            raise StopIteration
+        host, release = item
+        if release is not None:
+            self.releases[host] = release
+        return host
+
+
+class WorkerSweep(QRunnable):
+    """预扫描工作处理，端口开放的地址放入队列，其余直接计入进度"""
+    def __init__(self, engine, iterators, host_queue: HostQueue):
+        super(WorkerSweep, self).__init__()
+        self.engine = engine
+        self.iterators = iterators
+        self.host_queue = host_queue
+        self.signals = WorkerSignals()
+        self.controller = WorkerController.instance()  # 获取控制器单例‌
+        self.controller.register_worker(self)  # 自动注册
+
+    def stop(self):
+        """响应停止信号"""
+        self.engine.stop()
+
+    def connect(self, fn_result, fn_finish, fn_error):
+        """事件绑定"""
+        self.signals.result.connect(fn_result)
+        self.signals.finished.connect(fn_finish)
+        self.signals.error.connect(fn_error)
+
+    @Slot()
+    def run(self):
+        try:
+            self.engine.run(self.iterators, self.host_queue.put, lambda ip: self.signals.result.emit(0))
+        except Exception as e:
+            self.signals.error.emit((type(e), str(e), traceback.format_exc()))
+        finally:
+            self.host_queue.close()
+            self.signals.finished.emit()
+            self.controller.unregister_worker(self)
+
+
 class EMQXSignals(QObject):
     """定义线程信号"""
     connected = Signal()
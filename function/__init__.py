@@ -3,3 +3,5 @@ from .MessageBox import warning
 from .MessageBox import error
 from .MessageBox import success
 from .FunctionBox import ClientFunc
+from .Config import load_config
+from .Config import DEFAULT_CONFIG
@@ -1,18 +1,28 @@
 import csv
 import ipaddress
 import json
+import multiprocessing
 import os
 import tempfile
 from datetime import datetime
 import sys
-from itertools import islice
 from codingQrc import *  # noqa
 from PySide6.QtCore import QObject, Signal, QThreadPool, QRegularExpression, QTimer, QFile, QIODevice
 from PySide6.QtGui import QTextCursor, QRegularExpressionValidator
 from PySide6.QtWidgets import QApplication, QMainWindow, QLineEdit, QComboBox, QFileDialog, QDialog
 from codingUi import Ui_QMainWindow, Ui_Dialog
 from function import *
-from function.Worker import WorkerSingle, WorkerMultiple, WorkerController, EMQXWorker
+from function.Worker import WorkerSingle, WorkerMultiple, WorkerAsync, WorkerSweep, WorkerController, EMQXWorker, HostQueue
+from function.Probe import (AsyncProbe, ConnectSweep, SocketProbe, AdaptiveTimeout, Fingerprint, ScanContext, RateLimiter,
+                            parse_endpoints, SWEEP_BATCH, HTTP_WORKERS, fd_limit)
+from function.Store import NegativeCache, DeviceStore, ScanCheckpoint, SubnetStore, ResultSink
+from function.Target import (TargetDispenser, IntervalTree, parse_spec, parse_scopes, load_spec_file, split_wide, to_value,
+                             url_host)
+from function.Shard import ShardScan
+from function.Discovery import MulticastDiscovery
+from function.Watch import WatchScan
+from function.Plan import subnet_counts, estimate, format_duration
+from function.Neighbor import collect_neighbors
 
 
 class OutputStream(QObject):
@@ -88,6 +98,12 @@ class MainWindow(QMainWindow):
         # 限制输入内容
         for each in line_edit:
             each.setValidator(validator)
+        # 搜索参数的 IP 段可填写多个目标：CIDR、地址段或单个地址，以逗号分隔，IPv4 与 IPv6 均可
+        # IPv6 地址含十六进制字母与冒号，链路本地地址可带接口标识，如 fe80::1%eth0
+        spec_validator = QRegularExpressionValidator(QRegularExpression(r'^[0-9A-Za-z_:.,;/\-% ]+$'))
+        for each in [self.ui.LineEditIP01, self.ui.LineEditIP02]:
+            each.setValidator(spec_validator)
+            each.setMaxLength(1024)
 
         # 输出重定向
         sys.stdout = OutputStream(newText=self.onNewText)  # noqa
@@ -102,10 +118,17 @@ class MainWindow(QMainWindow):
         # 功能
         self.client = ClientFunc()
         self.client_list = []
-        self.client_temp = []
+        self.client_temp = {}  # 型号: [ip]
         self.monitor = ListMonitor(self.client_list)
         self.emqx_worker = None
         self.client_uuid = {}
+        self.search_context = None
+        self.search_signals = []  # 本次搜索工作器的信号
+        self.aborted_signals = set()  # 已终止但尚未结束的搜索工作器的信号
+        self.neighbors = set()  # 本次搜索中来自邻居表的地址，结果中单独标注
+        self.neighbor_token = None  # 正在工作线程中读取的邻居表，见 withNeighbors
+        self.checkpoint_timer = QTimer()
+        self.checkpoint_timer.timeout.connect(self.saveCheckpoint)
 
         # 事件绑定
         self.init_events()
@@ -176,6 +199,7 @@ class MainWindow(QMainWindow):
         self.ui.CBitButton03.clicked.connect(self.cMbps2MB)
         self.ui.CBitButton04.clicked.connect(self.cMbps2Kbps)
         self.ui.ExportButton03.clicked.connect(self.copyClientEvent)
+        self.ui.PlanButton.clicked.connect(self.plan_client)
         # 数据监听
         self.monitor.data_modified.connect(lambda: self.ui.ListBrowser.setPlainText("\n".join(str(x) for x in self.client_list)))
         self.ui.pushButton0601.clicked.connect(self.mqtt_connect)
@@ -225,6 +249,10 @@ class MainWindow(QMainWindow):
                 return 0
         else:
             WorkerController.instance().stop_all_workers()
+            self.neighbor_token = None  # 丢弃尚未读取完成的邻居表
+            if self.search_context is not None:
+                self.search_abort()
+                return 0
             self.ui.StartButton.setText("Start")
             warning('任务被终止，请等待任务结束。')
             return 0
@@ -232,51 +260,307 @@ class MainWindow(QMainWindow):
     def search_client(self):
         info('当前使用功能：搜索')
         self.client_temp.clear()
+        # 邻居表标注只针对本次搜索，恢复上次的结果前先清空
+        self.neighbors = set()
+        # 继续上次中断的搜索
+        if self.ui.ResumeCheckBox.isChecked():
+            checkpoint = ScanCheckpoint.load()
+            if checkpoint is None:
+                warning('没有可以继续的搜索。')
+                self.ui.StartButton.setChecked(False)
+                return 0
+            for ip, model in checkpoint.found:
+                self.showFound(ipaddress.ip_address(ip), model)
+            success(f'已恢复上次发现的 {len(checkpoint.found)} 台设备。')
+            return self.search_start(checkpoint.specs, checkpoint.mode, checkpoint.model, checkpoint)
         # 获取数据
         mode = self.ui.ComboBox01.currentIndex()
-        mode_name = self.ui.ComboBox01.currentText()
         model = self.ui.ComboBox02.currentIndex()
-        model_name = self.ui.ComboBox02.currentText()
-        ip01 = self.ui.LineEditIP01.text()
-        mark01 = self.ui.LineEditMark01.text()
-        ip02 = self.ui.LineEditIP02.text()
-        mark02 = self.ui.LineEditMark02.text()
         # 确认参数
-        if not (self.ui.LockCheckBox01.isChecked() and self.ui.LockCheckBox02.isChecked()):
-            warning('请锁定搜索模式和设备型号。')
+        if not self.ui.LockCheckBox01.isChecked():
+            warning('请锁定搜索模式。')
             self.ui.StartButton.setChecked(False)
             return 0
+        # 组播发现不需要搜索参数
+        if mode == 5:
+            return self.discover_start(mode, model)
         if not (self.ui.LockCheckBox03.isChecked() or self.ui.LockCheckBox04.isChecked()):
             warning('请锁定任一搜索参数。')
             self.ui.StartButton.setChecked(False)
             return 0
-        # 执行
-        info(f'当前模式：{mode_name}，当前型号：{model_name}')
-        progress_range = 0
+        if mode == 6:
+            return self.watch_start(self.searchSpecs(), mode, model)
+        return self.search_start(self.searchSpecs(), mode, model)
+
+    def searchSpecs(self):
+        """已锁定的搜索参数，返回目标描述列表"""
+        specs = []
         # 使用参数 1
         if self.ui.LockCheckBox03.isChecked():
-            info(f'使用参数：{ip01}/{mark01}')
-            # 计算工作量
-            host_islice, host_number = self.workerCount(ip01, mark01)
-            progress_range += host_number
-            # 分配工作
-            for host01 in host_islice:
-                worker01 = WorkerMultiple(self.client.search, host01, mode, model)
-                worker01.connect(self.workerMultipleResultEven, self.workerMultipleFinishEven, self.workerErrorEven)
-                self.threadpool.start(worker01)
-                self.task_count += 1
+            specs.append(self.targetSpec(self.ui.LineEditIP01.text(), self.ui.LineEditMark01.text()))
         # 使用参数 2
         if self.ui.LockCheckBox04.isChecked():
-            info(f'使用参数：{ip02}/{mark02}')
-            # 计算工作量
-            host_islice, host_number = self.workerCount(ip02, mark02)
-            progress_range += host_number
-            # 分配工作
-            for host02 in host_islice:
-                worker02 = WorkerMultiple(self.client.search, host02, mode, model)
-                worker02.connect(self.workerMultipleResultEven, self.workerMultipleFinishEven, self.workerErrorEven)
-                self.threadpool.start(worker02)
-                self.task_count += 1
+            specs.append(self.targetSpec(self.ui.LineEditIP02.text(), self.ui.LineEditMark02.text()))
+        return specs
+
+    def plan_client(self):
+        """搜索估算，按当前参数计算实际探测的地址数量与预计耗时，不发起探测"""
+        info('当前使用功能：搜索估算')
+        mode = self.ui.ComboBox01.currentIndex()
+        config = load_config()
+        if mode == 5:
+            info(f'组播发现将在 {config["discovery_window"]} 秒内收集应答。')
+            return 0
+        if mode == 6:
+            info(f'持续监视每 {config["watch_interval"]} 秒搜索一轮，每轮的探测均匀分布在整个周期内。')
+        if not (self.ui.LockCheckBox03.isChecked() or self.ui.LockCheckBox04.isChecked()):
+            warning('请锁定任一搜索参数。')
+            return 0
+        specs = self.searchSpecs()
+        try:
+            endpoints = parse_endpoints(config['probe_ports'])
+            include, exclude = self.targetLists(config)
+            seeds = self.needsSeeds(specs, config)
+        except (OSError, ValueError) as e:
+            warning(str(e))
+            return 0
+
+        def report(_, neighbors6):
+            try:
+                dispenser, _ = self.workerCount(specs, False, include, exclude, config, neighbors6)
+            except ValueError as e:
+                warning(str(e))
+                return
+            self.plan_report(mode, config, endpoints, dispenser)
+
+        # 过大的 IPv6 区间按邻居表估算，需先在工作线程中读取
+        if seeds:
+            self.withNeighbors(False, config['ipv6_echo'], report)
+        else:
+            report([], {})
+        return 0
+
+    def plan_report(self, mode, config, endpoints, dispenser):
+        """目标就绪后打印搜索估算"""
+        progress_range = dispenser.total
+        info(f'目标共 {progress_range} 个地址')
+        intervals = dispenser.intervals
+        targets = IntervalTree(intervals)
+        # 负缓存与已知设备
+        if config['negative_ttl'] > 0 and not self.ui.FullCheckBox.isChecked():
+            skip = config['negative_skip']
+            dead = [value for value in NegativeCache(config['negative_ttl']).load() if value in targets]
+            if skip:
+                intervals = IntervalTree((value, value) for value in dead).subtract(intervals)
+            info(f'负缓存命中 {len(dead)} 个近期无响应的地址，将{"跳过" if skip else "延后到最后探测"}')
+        known = sum(1 for value in DeviceStore().load() if value in targets)
+        info(f'范围内已知设备 {known} 台')
+        # 按模式计算同时在途的探测数量，逐个端口探测时无应答的地址需等待每个端口超时
+        # 预扫描模式中应答的地址还需交给少量 HTTP 工作器探测，两阶段分开估算
+        workers = 0
+        limit = fd_limit() or config['async_concurrency']  # 每个在途探测占用一个套接字
+        if mode in (2, 3, 6):
+            concurrency, attempts = min(config['async_concurrency'], limit), len(endpoints)
+        elif mode == 4:
+            processes = config['shard_processes'] or os.cpu_count() or 1
+            concurrency, attempts = min(config['async_concurrency'], config['shard_chunk'], limit) * processes, len(endpoints)
+        else:
+            concurrency, attempts, workers = SWEEP_BATCH, 1, HTTP_WORKERS
+        counts = subnet_counts(intervals, config['subnet_prefix'], config['subnet_prefix6'])
+        seconds, responders, history = estimate(counts, SubnetStore().load(), config, concurrency, attempts, workers)
+        info(f'实际探测 {sum(counts.values())} 个地址，分布在 {len(counts)} 个子网，其中 {history} 个子网有历史统计')
+        stage = f'预扫描同时在途 {concurrency} 个连接，{workers} 个工作器探测应答地址' if workers else f'同时在途 {concurrency} 个探测'
+        success(f'{stage}，预计应答 {responders:.0f} 台，预计耗时约 {format_duration(seconds)}')
+        return 0
+
+    def search_start(self, specs, mode, model, checkpoint=None):
+        """按目标描述启动搜索，checkpoint 不为空时只搜索其中尚未完成的地址"""
+        config = self.searchConfig(mode, model)
+        if config is None:
+            return 0
+        info(f'初始超时：{config["timeout"] * 1000:.0f} ms，将按子网 RTT 的 P{config["timeout_percentile"]} 自动调整')
+        # 计算工作量，全部参数合并为互不重叠的区间，每个地址只探测一次
+        # 继续乱序搜索时遍历顺序已由断点确定，不再按邻居表调整
+        reorder = checkpoint is None or checkpoint.key is None
+        self.searchTargets(specs, config,
+                           lambda *targets: self.search_run(specs, mode, model, checkpoint, config, *targets),
+                           reorder and config['neighbor_first'])
+        return 0
+
+    def search_run(self, specs, mode, model, checkpoint, config, dispenser, include, exclude, neighbors, neighbors6):
+        """目标就绪后继续启动搜索，neighbors 与 neighbors6 为本机邻居表，未读取时为空"""
+        progress_range = dispenser.total
+        info(f'目标合并为 {len(dispenser.intervals)} 个区间，共 {progress_range} 个地址')
+        if checkpoint is None:
+            checkpoint = ScanCheckpoint(specs, mode, model, dispenser.intervals)
+        else:
+            keep = checkpoint.intervals
+            if include is not None:
+                keep = include.intersect(keep)
+            if exclude is not None:
+                keep = exclude.subtract(keep)
+            keep = IntervalTree(keep)
+            if checkpoint.key is None:
+                dispenser = TargetDispenser(keep.intersect(checkpoint.remaining()), False, dispenser.scopes)
+            else:
+                # 乱序搜索按保存的密钥与优先、延后的地址复现遍历顺序，从断点的遍历序号继续
+                dispenser = TargetDispenser(checkpoint.intervals, True, dispenser.scopes, checkpoint.key)
+                dispenser.prioritize(checkpoint.first)
+                dispenser.defer(checkpoint.deferred)
+                dispenser.resume(checkpoint.position, checkpoint.ahead, keep)
+            progress_range = dispenser.total
+            info(f'继续上次搜索，已完成 {checkpoint.count()} 个地址，剩余 {progress_range} 个地址')
+            if progress_range == 0:
+                success('上次搜索已全部完成。')
+                self.ui.StartButton.setChecked(False)
+                return 0
+        if dispenser.shuffle:
+            info('乱序扫描，按伪随机排列遍历全部目标地址。')
+        negative = NegativeCache(config['negative_ttl']) if config['negative_ttl'] > 0 else None
+        devices = DeviceStore()
+        context = self.searchContext(config, model, negative=negative, devices=devices, checkpoint=checkpoint,
+                                     subnets=SubnetStore())
+        if config['subnet_concurrency'] > 0:
+            info(f'每个 /{config["subnet_prefix"]} 子网同时最多 {config["subnet_concurrency"]} 个探测')
+        # 继续乱序搜索时遍历顺序已由断点确定，不再调整
+        reorder = checkpoint.key is None
+        # 邻居表中的地址大多在线，最先探测，结果单独标注，链路本地地址按邻居表中的接口探测
+        if reorder and config['neighbor_first']:
+            count = dispenser.prioritize(neighbors + list(neighbors6))
+            dispenser.scopes.update((value, scope) for value, scope in neighbors6.items() if scope)
+            self.neighbors = set(dispenser.first)
+            info(f'邻居表中有 {count} 个地址在搜索范围内，最先探测')
+        # 已知设备优先复核
+        if reorder and mode == 3:
+            known = devices.load()
+            count = dispenser.prioritize(sorted(known, key=lambda v: known[v][1], reverse=True))
+            info(f'优先复核 {count} 台已知设备，随后搜索其余地址')
+        # 负缓存，近期无响应的地址延后或跳过
+        if reorder and negative is not None:
+            if self.ui.FullCheckBox.isChecked():
+                info('全量扫描，忽略负缓存。')
+            else:
+                skip = config['negative_skip']
+                count = dispenser.defer(negative.load(), skip)
+                progress_range = dispenser.total
+                info(f'负缓存命中 {count} 个近期无响应的地址，已{"跳过" if skip else "延后到最后探测"}')
+        checkpoint.track(dispenser)
+        if progress_range == 0:
+            warning('搜索目标为空。')
+            self.ui.StartButton.setChecked(False)
+            return 0
+        self.searchLaunch(context, lambda: self.search_dispatch(dispenser, mode, context), progress_range,
+                          '任务已启动，请等待运行。')
+
+    def discover_start(self, mode, model):
+        """组播发现，发送一次查询并确认窗口内的应答者"""
+        config = self.searchConfig(mode, model)
+        if config is None:
+            return 0
+        context = self.searchContext(config, model, devices=DeviceStore())
+        engine = MulticastDiscovery(context, config['discovery_targets'], config['discovery_window'])
+        for host, port, kind in engine.targets:
+            info(f'发送 {kind.upper()} 查询：{host}:{port}')
+        # 应答数量未知，进度条显示为忙碌状态
+        self.searchLaunch(context, lambda: self.searchWorker(WorkerAsync(engine, None)), 0,
+                          f'任务已启动，将在 {config["discovery_window"]} 秒内收集应答。')
+        return 0
+
+    def watch_start(self, specs, mode, model):
+        """持续监视，按周期重复搜索目标，只打印新出现与已消失的设备，并逐台更新搜索结果"""
+        config = self.searchConfig(mode, model)
+        if config is None:
+            return 0
+        self.searchTargets(specs, config, lambda dispenser, *_: self.watch_run(model, config, dispenser))
+        return 0
+
+    def watch_run(self, model, config, dispenser):
+        """目标就绪后启动持续监视"""
+        interval = config['watch_interval']
+        info(f'目标共 {dispenser.total} 个地址，每 {interval} 秒搜索一轮，每秒约 {dispenser.total / interval:.1f} 个探测')
+        context = self.searchContext(config, model, devices=DeviceStore(), subnets=SubnetStore())
+        engine = WatchScan(context, interval, config['async_concurrency'])
+        # 持续运行直到终止，进度条显示为忙碌状态
+        self.searchLaunch(context, lambda: self.searchWorker(WorkerAsync(engine, dispenser), self.watchResultEven), 0,
+                          '任务已启动，点击 Abort 停止监视。')
+
+    def searchConfig(self, mode, model):
+        """各搜索模式共同的准备：打印模式，读取配置并检查探测端口，配置有误时返回 None"""
+        info(f'当前模式：{self.ui.ComboBox01.itemText(mode)}，按指纹识别型号，'
+             f'未识别的响应归入：{self.ui.ComboBox02.itemText(model)}')
+        config = load_config()
+        if not self.checkEndpoints(config):
+            return None
+        return config
+
+    def searchTargets(self, specs, config, then, neighbor_first=False):
+        """按搜索参数与包含、排除列表生成目标，需要邻居表时先在工作线程中读取，出错或目标为空时不再继续
+        目标就绪后调用 then(分发器, 包含列表, 排除列表, IPv4 邻居, {IPv6 邻居: 接口})
+        """
+        for spec in specs:
+            info(f'使用参数：{spec}')
+        try:
+            include, exclude = self.targetLists(config)
+            seeds = self.needsSeeds(specs, config)
+        except (OSError, ValueError) as e:
+            warning(str(e))
+            self.ui.StartButton.setChecked(False)
+            return
+
+        def build(neighbors, neighbors6):
+            try:
+                dispenser, total = self.workerCount(specs, self.ui.ShuffleCheckBox.isChecked(), include, exclude,
+                                                    config, neighbors6)
+            except ValueError as e:
+                warning(str(e))
+                self.ui.StartButton.setChecked(False)
+                return
+            if total == 0:
+                warning('搜索目标为空。')
+                self.ui.StartButton.setChecked(False)
+                return
+            then(dispenser, include, exclude, neighbors, neighbors6)
+
+        if seeds or neighbor_first:
+            self.withNeighbors(neighbor_first, seeds and config['ipv6_echo'], build)
+        else:
+            build([], {})
+
+    def withNeighbors(self, ipv4, echo, then):
+        """在工作线程中读取本机邻居表，避免命令与组播回显的等待阻塞界面，完成后在界面线程调用 then(IPv4 邻居, {IPv6 邻居: 接口})
+        期间终止搜索或重新启动时丢弃结果
+        """
+        info('正在读取本机邻居表，请稍候。' if not echo else '正在向各接口的全节点组播地址发送回显并读取本机邻居表，请稍候。')
+        token = self.neighbor_token = object()
+
+        def done(result):
+            if self.neighbor_token is token:
+                self.neighbor_token = None
+                then(*result)
+
+        def failed(e):
+            self.workerErrorEven(e)
+            self.ui.StartButton.setChecked(False)
+
+        worker = WorkerSingle(collect_neighbors, ipv4, echo)
+        worker.connect(done, lambda: None, failed)
+        self.threadpool.start(worker)
+
+    def searchContext(self, config, model, **kwargs):
+        """按配置设置全局限速并创建扫描状态，kwargs 为各模式需要的记录，见 ScanContext"""
+        limiter = RateLimiter.instance().configure(config['rate_limit'], config['rate_burst'], config['rate_report'])
+        if config['rate_limit'] > 0:
+            info(f'探测限速：每秒 {config["rate_limit"]} 个，突发 {config["rate_burst"]} 个')
+        return ScanContext(config, Fingerprint(model, config['fingerprints']), AdaptiveTimeout(config),
+                           limiter=limiter, sink=self.resultSink(config), **kwargs)
+
+    def searchLaunch(self, context, dispatch, progress_range, message):
+        """启动搜索工作器并切换界面状态，dispatch 负责启动工作器，progress_range 为 0 时进度条显示为忙碌状态"""
+        self.search_context = context
+        self.search_signals = []
+        dispatch()
+        # 定期保存断点并写入结果文件
+        self.checkpoint_timer.start(int(context.config['checkpoint_interval'] * 1000))
         # 显示进度条
         self.progress_value = 0
         self.ui.ProgressBar.setRange(0, progress_range)
@@ -284,9 +568,90 @@ class MainWindow(QMainWindow):
         self.ui.ProgressBar.setVisible(True)
         # 切换按钮状态，避免多次点击
         self.ui.StartButton.setText("Abort")
-        info(f'任务已启动，请等待运行。')
-        # info(f'当前可用线程数量：{self.threadpool.maxThreadCount() - self.threadpool.activeThreadCount()}')
-        return 0
+        info(message)
+
+    def checkEndpoints(self, config):
+        """检查探测端口配置，端口多于一个时打印探测顺序"""
+        try:
+            endpoints = parse_endpoints(config['probe_ports'])
+        except ValueError as e:
+            warning(str(e))
+            self.ui.StartButton.setChecked(False)
+            return False
+        if len(endpoints) > 1:
+            info(f'探测端口：{"、".join(f"{scheme}:{port}" for scheme, port in endpoints)}，以第一个应答的端口为准')
+        return True
+
+    def saveCheckpoint(self):
+        """定期保存搜索断点，并写入结果文件中尚未写入的结果"""
+        if self.search_context is not None and self.search_context.checkpoint is not None:
+            self.search_context.checkpoint.save()
+        if self.search_context is not None and self.search_context.sink is not None:
+            self.search_context.sink.flush()
+
+    @staticmethod
+    def resultSink(config):
+        """按配置创建结果文件的流式输出，未配置时为 None"""
+        if not config['result_file']:
+            return None
+        sink = ResultSink(config['result_file'], config['result_batch'])
+        info(f'搜索结果将逐条追加到 {sink.path}（{sink.format.upper()}），每 {sink.batch} 条写入一次')
+        return sink
+
+    def search_dispatch(self, dispenser, mode, context):
+        """分配搜索工作"""
+        # 多进程模式，目标分批交给进程池，结果成批返回
+        if mode == 4:
+            engine = ShardScan(0, context, context.config['shard_processes'], context.config['shard_chunk'])
+            info(f'启动 {engine.processes} 个探测进程，每批 {engine.chunk} 个地址')
+            self.searchWorker(WorkerAsync(engine, dispenser), self.workerBatchResultEven)
+            return
+        # 事件循环模式，单个工作器承载全部探测
+        if mode in (2, 3):
+            engine = AsyncProbe(0, context, context.config['async_concurrency'])
+            if engine.concurrency < context.config['async_concurrency']:
+                info(f'受文件描述符上限限制，同时在途的探测数量降为 {engine.concurrency}')
+            self.searchWorker(WorkerAsync(engine, dispenser))
+            return
+        # 预扫描，仅设备端口开放的地址进入 HTTP 探测
+        host_queue = HostQueue()
+        self.searchWorker(WorkerSweep(ConnectSweep(context), dispenser, host_queue))
+        # 分配工作，默认使用套接字探测，http_client 为 requests 时使用 ClientFunc.search
+        if context.config['http_client'] == 'requests':
+            search, args = self.client.search, (mode, context)
+        else:
+            search, args = SocketProbe(mode, context).search, ()
+        for _ in range(HTTP_WORKERS):
+            self.searchWorker(WorkerMultiple(search, host_queue, *args))
+
+    def searchWorker(self, worker, fn_result=None):
+        """启动搜索工作器，并记录其信号，终止后用于忽略该工作器的后续信号"""
+        worker.connect(fn_result or self.workerMultipleResultEven, self.workerMultipleFinishEven, self.workerErrorEven)
+        self.search_signals.append(worker.signals)
+        self.threadpool.start(worker)
+        self.task_count += 1
+
+    def search_abort(self):
+        """立即终止搜索，中断在途探测，按已完成的地址保存记录并恢复按钮状态，不等待工作器结束"""
+        context = self.search_context
+        finished = context.abort()
+        # 已终止的工作器稍后发出的信号全部忽略
+        self.aborted_signals.update(self.search_signals)
+        self.search_signals = []
+        self.completed_tasks = 0
+        self.task_count = 0
+        self.checkpoint_timer.stop()
+        self.search_context = None
+        self.ui.StartButton.setText("Start")
+        self.ui.StartButton.setChecked(False)
+        self.ui.ProgressBar.setVisible(False)
+        total = self.ui.ProgressBar.maximum()
+        context.close()
+        self.showStats(context)
+        if total:
+            warning(f'任务已终止：已完成 {finished} 个地址，跳过 {total - finished} 个地址。')
+        else:
+            warning(f'任务已终止：已完成 {finished} 个地址。')
 
     def set_client(self):
         info('当前使用功能：批量设置')
@@ -366,17 +731,69 @@ class MainWindow(QMainWindow):
         return 0
 
     @staticmethod
-    def workerCount(ip, mark):
-        """工作量计算"""
-        cidr = f'{ip}/{mark}'
-        network = ipaddress.IPv4Network(cidr, strict=False)
-        # network_address = network.network_address
-        # broadcast_address = network.broadcast_address
-        host_address = network.hosts()
-        host_number = network.num_addresses - 2
-        host_gen = iter(host_address)
-        host_islice = [islice(host_gen, i, i + host_number // 5 + (1 if i < host_number % 5 else 0)) for i in range(5)]
-        return host_islice, host_number
+    def targetSpec(ip, mark):
+        """IP 段为单个地址时与掩码组成 CIDR，否则（含带接口标识的地址）按目标描述原样使用"""
+        ip = ip.strip()
+        if any(c in ip for c in ',;/-% '):
+            return ip
+        return f'{ip}/{mark}'
+
+    @staticmethod
+    def targetLists(config):
+        """读取包含列表与排除列表，未配置时为 None，配置的文件不存在时报错，默认的排除列表不存在时忽略"""
+        trees = []
+        for key, name in (('include_file', '包含'), ('exclude_file', '排除')):
+            path = config[key]
+            if not path or (path == DEFAULT_CONFIG[key] and not os.path.exists(path)):
+                trees.append(None)
+                continue
+            if not os.path.exists(path):
+                raise OSError(f'{name}列表 {path} 不存在，请检查 search.json 中的 {key}')
+            tree = IntervalTree(load_spec_file(path))
+            info(f'{name}列表 {path}：{len(tree)} 个区间')
+            trees.append(tree)
+        return trees
+
+    @staticmethod
+    def workerCount(specs: list[str], shuffle=False, include=None, exclude=None, config=None, seeds=None):
+        """工作量计算，返回共享的目标分发器与精确的主机数量，目标只保留包含列表内且不在排除列表内的地址
+        给出 config 时，过大的 IPv6 区间改为只探测 seeds（IPv6 邻居表与组播回显，{整数编号: 接口}）中落在其中的地址
+        """
+        intervals = parse_spec(', '.join(specs))
+        scopes = parse_scopes(', '.join(specs))
+        if include is not None or exclude is not None:
+            total = TargetDispenser(intervals).total
+            if include is not None:
+                intervals = include.intersect(intervals)
+            if exclude is not None:
+                intervals = exclude.subtract(intervals)
+            info(f'按包含与排除列表去除 {total - TargetDispenser(intervals).total} 个地址')
+        if config is not None:
+            intervals, found = MainWindow.seedTargets(intervals, config, seeds or {})
+            scopes.update(found)
+        dispenser = TargetDispenser(intervals, shuffle, scopes)
+        return dispenser, dispenser.total
+
+    @staticmethod
+    def needsSeeds(specs, config):
+        """搜索参数中是否有超过 ipv6_range_max 的 IPv6 区间，需要先读取 IPv6 邻居表作为其中的探测目标"""
+        return bool(split_wide(parse_spec(', '.join(specs)), config['ipv6_range_max'])[1])
+
+    @staticmethod
+    def seedTargets(intervals, config, seeds):
+        """IPv6 网段无法逐个探测，超过 ipv6_range_max 的区间只保留 seeds 中的地址
+        :param seeds: IPv6 邻居表与全节点组播回显，{整数编号: 接口}，见 collect_neighbors
+        :return: (区间, {整数编号: 接口})，接口仅对链路本地地址有效
+        """
+        limit = config['ipv6_range_max']
+        intervals, wide = split_wide(intervals, limit)
+        if not wide:
+            return intervals, {}
+        info(f'{len(wide)} 个 IPv6 区间超过 {limit} 个地址，只探测邻居表与组播回显中落在其中的地址')
+        tree = IntervalTree(wide)
+        found = {value: scope for value, scope in seeds.items() if value in tree}
+        info(f'IPv6 邻居表与组播回显共 {len(seeds)} 个地址，其中 {len(found)} 个在搜索范围内')
+        return intervals + [(value, value) for value in found], {value: scope for value, scope in found.items() if scope}
 
     @staticmethod
     def workerErrorEven(s):
@@ -385,24 +802,75 @@ class MainWindow(QMainWindow):
 
     def workerMultipleResultEven(self, s):
         """worker批量事件结果处理"""
+        if self.sender() in self.aborted_signals:
+            return None
         if s == 0:
             self.progress_value += 1
             self.ui.ProgressBar.setValue(self.progress_value)
             return 0
         try:
-            # 尝试将字符串解析为 IPv4 或 IPv6 地址
-            ip = ipaddress.ip_address(s)
-            self.client_temp.append(ip)
-            success(f'<span>IP：</span><a style="color: #0066cc" href="http://{ip}">{ip}</a>')
-        except ValueError:
-            success(s)
+            if isinstance(s, tuple):
+                # 搜索结果 (ip, 型号)
+                self.showFound(*s)
+            else:
+                success(s)
         finally:
             self.progress_value += 1
             self.ui.ProgressBar.setValue(self.progress_value)
         return None
 
+    def workerBatchResultEven(self, s):
+        """worker成批结果处理，s 为 (完成数量, [(ip, 型号)])"""
+        if self.sender() in self.aborted_signals:
+            return
+        count, found = s
+        for ip, model in found:
+            self.showFound(ip, model)
+        self.progress_value += count
+        self.ui.ProgressBar.setValue(self.progress_value)
+
+    def watchResultEven(self, s):
+        """持续监视每轮的结果，s 为 (轮次, 新出现 [(ip, 型号)], 已消失 [(ip, 型号)])"""
+        if self.sender() in self.aborted_signals:
+            return
+        rounds, appeared, disappeared = s
+        info(f'第 {rounds} 轮搜索完成：新出现 {len(appeared)} 台，已消失 {len(disappeared)} 台')
+        for ip, model in appeared:
+            self.showFound(ip, model)
+        for ip, model in disappeared:
+            devices = self.client_temp.get(model, [])
+            if ip in devices:
+                devices.remove(ip)
+            warning(f'<span>设备已消失，IP：{ip}，型号：{self.ui.ComboBox02.itemText(model)}</span>')
+
+    @staticmethod
+    def showStats(context):
+        """打印各子网的应答率与延迟，连接 RTT 慢的子网在前"""
+        limit = context.config['stats_rows']
+        rows = context.stats.rows(context.timeouts)
+        if not limit or not rows:
+            return
+        rows.sort(key=lambda row: row[4] or 0, reverse=True)
+        info(f'子网统计（共 {len(rows)} 个子网，连接 RTT 从慢到快）：')
+        for subnet, probed, hits, latency, rtt, timeout in rows[:limit]:
+            latency = f'{latency * 1000:.0f} ms' if latency is not None else '-'
+            rtt = f'{rtt * 1000:.0f} ms' if rtt is not None else '-'
+            info(f'{subnet}：探测 {probed}，应答 {hits}（{hits / probed:.1%}），响应延迟 {latency}，'
+                 f'连接 RTT {rtt}，连接超时 {timeout * 1000:.0f} ms')
+
+    def showFound(self, ip, model):
+        """记录并打印搜索到的设备，来自邻居表的地址在结果后标注"""
+        # 邻居表中的地址与其余地址同时在途，结果到达顺序不固定，因此逐条标注而不分组
+        mark = '（邻居表）' if to_value(ip) in self.neighbors else ''
+        self.client_temp.setdefault(model, []).append(ip)
+        success(f'<span>IP：</span><a style="color: #0066cc" href="http://{url_host(ip)}">{ip}</a>'
+                f'<span>，型号：{self.ui.ComboBox02.itemText(model)}{mark}</span>')
+
     def workerMultipleFinishEven(self):
         """worker批量事件完成处理"""
+        if self.sender() in self.aborted_signals:
+            self.aborted_signals.discard(self.sender())
+            return
         self.completed_tasks += 1
         if self.completed_tasks == self.task_count:
             self.completed_tasks = 0
@@ -410,6 +878,11 @@ class MainWindow(QMainWindow):
             self.ui.StartButton.setText("Start")
             self.ui.StartButton.setChecked(False)
             self.ui.ProgressBar.setVisible(False)
+            if self.search_context is not None:
+                self.checkpoint_timer.stop()
+                self.search_context.close()
+                self.showStats(self.search_context)
+                self.search_context = None
             info(f'任务已全部结束。')
             # info(f'当前设备列表数量：{len(self.client_list)}')
 
@@ -466,10 +939,10 @@ class MainWindow(QMainWindow):
         # 分配工作
         if flag == 0:
             info('当前使用功能：导出 TXT')
-            worker = WorkerSingle(self.client.export, self.client_temp, model, 0)
+            worker = WorkerSingle(self.client.export, self.client_temp.get(model, []), model, 0)
         else:
             info('当前使用功能：导出 CSV')
-            worker = WorkerSingle(self.client.export, self.client_temp, model, 1)
+            worker = WorkerSingle(self.client.export, self.client_temp.get(model, []), model, 1)
         worker.connect(self.workerSingleResultEven, self.workerSingleFinishEven, self.workerErrorEven)
         self.threadpool.start(worker)
 
@@ -521,14 +994,15 @@ class MainWindow(QMainWindow):
     def showClientButtonEvent(self):
         info('开始打印设备列表。')
         for ip in self.client_list:
-            info(f'<a style="color: #0066cc" href="http://{ip}">{ip}</a>')
+            info(f'<a style="color: #0066cc" href="http://{url_host(ip)}">{ip}</a>')
         success('设备列表已打印完成。')
 
     def copyClientEvent(self):
-        for each in self.client_temp:
+        model = self.ui.ComboBox02.currentIndex()
+        for each in self.client_temp.get(model, []):
             if each not in self.client_list:
                 self.client_list.append(each)
-        success('结果已复制到列表。')
+        success(f'{self.ui.ComboBox02.currentText()} 结果已复制到列表。')
 
     def saveClientEvent(self):
         data = self.ui.ListBrowser.toPlainText()
@@ -799,6 +1273,9 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
 
+    # 打包后多进程搜索的子进程入口
+    multiprocessing.freeze_support()
+
     if "NUITKA_ONEFILE_PARENT" in os.environ:
         splash_filename = os.path.join(
             tempfile.gettempdir(),